@@ -8,7 +8,7 @@ class AgenticExitSignal(BaseException):
         self.status = status
         super().__init__(f"Agentic loop exit: {status} - {result}")
 
-@dataclass
+@dataclass(slots=True)
 class AgenticState:
     """Tracks state for a multi-step agentic loop."""
     is_active: bool = False
@@ -33,5 +33,5 @@ class AgenticState:
         self.last_command = ""
         self.last_output = ""
         self.last_exit_code = None
-        self.modified_files = []
+        self.modified_files.clear()
         self.terminal_session_open = False
@@ -1,4 +1,19 @@
-from typing import List, Dict, Any, Optional
+import bisect
+import json
+import logging
+from collections import deque
+from functools import lru_cache
+from itertools import accumulate
+from typing import Callable, Deque, List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def approx_token_count(text: str) -> int:
+    """Character-based heuristic: ~4 characters per token."""
+    return len(text) // 4
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
 
 class ChatHistory:
     """
@@ -7,92 +22,180 @@ class ChatHistory:
     - {"role": "user", "content": "..."}
     - {"role": "miyori", "content": "...", "tool_calls": [...]}
     - {"role": "tool", "content": "...", "name": "tool_name", "tool_call_id": "..."}
+
+    Messages are kept as the dicts above rather than split into per-field arrays:
+    every provider call needs the full history as dicts, so a columnar layout would
+    rebuild all of them per turn to save a few hundred KB at most. The per-message
+    numbers that are scanned (token costs) already live in their own array.
     """
 
-    def __init__(self, max_tokens: int = 8000, trim_chunk_size: int = 1000):
-        self.messages: List[Dict[str, Any]] = []
+    __slots__ = (
+        "messages", "max_tokens", "trim_chunk_size", "_msg_tokens", "_total_tokens",
+        "_last_user_seq", "_added", "_dropped", "_count_tokens",
+    )
+
+    def __init__(
+        self,
+        max_tokens: int = 8000,
+        trim_chunk_size: int = 1000,
+        token_counter: Optional[Callable[[str], int]] = None
+    ):
+        # Deques so trimming the oldest turns is O(1) per message
+        self.messages: Deque[Dict[str, Any]] = deque()
         self.max_tokens = max_tokens
         self.trim_chunk_size = trim_chunk_size
+        # Token cost of each message (parallel to self.messages) and their running total
+        self._msg_tokens: Deque[int] = deque()
+        self._total_tokens = 0
+        # Position of the newest user message, counted from the first message ever added,
+        # and how many messages trimming has dropped; their difference is its current index
+        self._last_user_seq: Optional[int] = None
+        self._added = 0
+        self._dropped = 0
+        # A real tokenizer is expensive per call, so memoize it by text; the default heuristic isn't worth caching
+        self._count_tokens = lru_cache(maxsize=4096)(token_counter) if token_counter else approx_token_count
 
     def add_message(self, role: str, content: str, **kwargs) -> None:
         """
         Adds a message to the history and trims if necessary.
         """
+        self._append(role, content, kwargs)
+        
+        # Trim only if we exceed the limit
+        if self._total_tokens > self.max_tokens:
+            self.trim_to_limit(self.max_tokens, self.trim_chunk_size)
+
+    def add_messages(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        Adds several messages (in the internal format) and trims at most once afterwards.
+        """
+        for message in messages:
+            extras = {key: value for key, value in message.items() if key not in ("role", "content")}
+            self._append(message["role"], message.get("content", ""), extras)
+
+        if self._total_tokens > self.max_tokens:
+            self.trim_to_limit(self.max_tokens, self.trim_chunk_size)
+
+    def _append(self, role: str, content: Any, extras: Dict[str, Any]) -> None:
         message = {"role": role, "content": content}
-        message.update(kwargs)
+        message.update(extras)
+        # Cost comes straight from the arguments; no need to walk the assembled dict
+        tokens = self._entry_tokens(content, extras)
+        if role == "user":
+            self._last_user_seq = self._added
+        self._added += 1
         self.messages.append(message)
-        
-        # Trim if we exceed the limit
-        self.trim_to_limit(self.max_tokens, self.trim_chunk_size)
+        self._msg_tokens.append(tokens)
+        self._total_tokens += tokens
 
     def get_history(self) -> List[Dict[str, Any]]:
-        """Returns the current message history."""
-        return self.messages
+        """Returns the current message history as a new list; callers may modify the list freely."""
+        return list(self.messages)
+
+    def last_user_index(self) -> Optional[int]:
+        """Index in get_history() of the most recent user message, or None if there is none."""
+        if self._last_user_seq is None or self._last_user_seq < self._dropped:
+            return None
+        return self._last_user_seq - self._dropped
+
+    def seq_range(self) -> Tuple[int, int]:
+        """
+        Sequence numbers [first, end) of the messages currently held.
+        A message keeps its number across trims, so get_history()[i] is message first + i.
+        """
+        return self._dropped, self._added
 
     def get_token_count(self) -> int:
         """
-        Simple character-based heuristic: len(content) // 4.
-        Applies to all content in the messages.
+        Total tokens across all messages, per the configured token counter
+        (default: len(text) // 4). Maintained incrementally, so O(1).
         """
-        return self._calculate_tokens(self.messages)
-
-    def _calculate_tokens(self, messages: List[Dict[str, Any]]) -> int:
-        """Calculates token count for a list of messages."""
-        total_tokens = 0
-        for msg in messages:
-            content = msg.get("content", "")
-            total_tokens += len(str(content)) // 4
-            
-            if "tool_calls" in msg:
-                for tool_call in msg["tool_calls"]:
-                    total_tokens += len(str(tool_call)) // 4
-                    
-            for key, value in msg.items():
-                if key not in ["role", "content", "tool_calls"]:
-                    total_tokens += len(str(value)) // 4
-        return total_tokens
+        return self._total_tokens
+
+    def _entry_tokens(self, content: Any, extras: Dict[str, Any]) -> int:
+        """Token count of a message given its content and its extra keys (tool_calls, name, ...)."""
+        count = self._count_tokens
+        tokens = count(str(content))
+        for key, value in extras.items():
+            if key == "tool_calls":
+                # Price tool calls by their compact JSON, which is closer to what the provider receives than repr()
+                tokens += sum(count(_compact_json(tool_call)) for tool_call in value)
+            else:
+                tokens += count(str(value))
+        return tokens
+
+    def _drop_oldest(self, count: int) -> None:
+        """Remove the first `count` messages along with their cached token counts."""
+        for _ in range(count):
+            self.messages.popleft()
+            self._total_tokens -= self._msg_tokens.popleft()
+        self._dropped += count
 
     def clear(self) -> None:
         """Resets the history."""
-        self.messages = []
+        self.messages.clear()
+        self._msg_tokens.clear()
+        self._total_tokens = 0
+        self._last_user_seq = None
+        self._added = 0
+        self._dropped = 0
+
+    def keep_last_turns(self, turns: int) -> int:
+        """
+        Drop everything before the `turns`-th most recent user message.
+        Returns how many messages were dropped.
+        """
+        if turns <= 0:
+            return 0
+        seen = 0
+        for i in range(len(self.messages) - 1, 0, -1):
+            if self.messages[i]["role"] == "user":
+                seen += 1
+                if seen == turns:
+                    self._drop_oldest(i)
+                    return i
+        return 0
 
     def trim_to_limit(self, max_tokens: int, chunk_size: int) -> None:
         """
         Turn-aware trimming: remove oldest turns until token count is under limit.
         Always starts history with a 'user' message.
         """
-        current_tokens = self.get_token_count()
+        current_tokens = self._total_tokens
         if current_tokens <= max_tokens:
             return
 
-        print(f"ChatHistory: Trimming history. Current tokens: {current_tokens}, Limit: {max_tokens}")
+        logger.debug("ChatHistory: Trimming history. Current tokens: %d, Limit: %d", current_tokens, max_tokens)
         
         target_tokens = max_tokens - chunk_size
         
+        # Starting history at message i keeps current_tokens - prefix[i] tokens. prefix is
+        # non-decreasing, so the first start that fits (prefix[i] >= must_drop) can be binary-searched.
+        prefix = list(accumulate(self._msg_tokens, initial=0))
+        must_drop = current_tokens - target_tokens
+        
         # Identify all indices of 'user' messages (safe starting points)
         user_indices = [i for i, msg in enumerate(self.messages) if msg["role"] == "user"]
         
         if not user_indices:
             # Fallback if no user messages exist (shouldn't happen in normal flow)
-            while self.messages and self.get_token_count() > target_tokens:
-                if len(self.messages) <= 1: break
-                self.messages.pop(0)
-            print(f"ChatHistory: Trimming complete (fallback). New tokens: {self.get_token_count()}")
+            # Drop the oldest messages until under target, but always keep the newest one
+            last = len(self.messages) - 1
+            drop = bisect.bisect_left(range(last), must_drop, key=prefix.__getitem__)
+            self._drop_oldest(drop)
+            logger.debug("ChatHistory: Trimming complete (fallback). New tokens: %d", self._total_tokens)
             return
 
         # We want to find the first user turn that brings us under the limit.
         # We MUST keep at least the last user turn.
         new_start_index = user_indices[-1] # Default to keeping only the last turn
-        
-        for idx in user_indices:
-            # If keeping messages from this idx onwards fits in target_tokens
-            if self._calculate_tokens(self.messages[idx:]) <= target_tokens:
-                new_start_index = idx
-                break
-            # If we are at the last user index and even it doesn't fit, 
-            # we've already set new_start_index = user_indices[-1].
+
+        pos = bisect.bisect_left(user_indices, must_drop, key=prefix.__getitem__)
+        if pos < len(user_indices):
+            new_start_index = user_indices[pos]
+        # If even the last user turn doesn't fit, we keep it anyway (default above).
             
         if new_start_index > 0:
-            self.messages = self.messages[new_start_index:]
+            self._drop_oldest(new_start_index)
             
-        print(f"ChatHistory: Trimming complete. New tokens: {self.get_token_count()}")
+        logger.debug("ChatHistory: Trimming complete. New tokens: %d", self._total_tokens)
@@ -1,17 +1,42 @@
 import datetime
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Callable, Optional
 import uuid
 from miyori.core.agentic_state import AgenticExitSignal
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Cap on modified files listed in the agentic context block
+_MAX_LISTED_FILES = 50
+
+def _log_dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize a log payload to UTF-8 JSON, via orjson when it's installed."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option, default=str)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False, default=str).encode("utf-8")
+
 class LLMCoordinator:
     """
     Provider-agnostic orchestration of LLM conversations.
     Handles tool-calling loops, memory context injection, and history management.
     """
 
-    METADATA_KEYS_TO_STRIP = ["thought_signature"]
+    # Keys removed from logged payloads. To change it, assign a new frozenset
+    # (class or subclass attribute); an empty set turns stripping off entirely.
+    METADATA_KEYS_TO_STRIP = frozenset({"thought_signature"})
+
+    __slots__ = (
+        "chat_history", "_translate_to_provider", "_call_provider_api", "_parse_provider_response",
+        "_format_tool_result", "_stream_provider_api", "max_tool_turns", "max_history_turns", "enable_parallel_tool_execution", "_tool_executor", "_pending_logs", "_pending_appends", "_log_lock",
+        "_log_ready", "_log_thread", "_logged_first", "_logged_upto",
+    )
 
     def __init__(
         self,
@@ -20,14 +45,40 @@ class LLMCoordinator:
         call_provider_api_callback: Callable,
         parse_provider_response_callback: Callable,
         format_tool_result_callback: Callable,
-        max_tool_turns: int = 12
+        max_tool_turns: int = 12,
+        max_history_turns: Optional[int] = None,
+        enable_parallel_tool_execution: bool = True,
+        stream_provider_api_callback: Optional[Callable] = None,
+        max_parallel_tools: int = 4
     ):
         self.chat_history = chat_history
         self._translate_to_provider = translate_to_provider_callback
         self._call_provider_api = call_provider_api_callback
         self._parse_provider_response = parse_provider_response_callback
         self._format_tool_result = format_tool_result_callback
+        # Optional: yields parsed partial responses ({"text", "thought", "tool_calls"}) as they arrive
+        self._stream_provider_api = stream_provider_api_callback
         self.max_tool_turns = max_tool_turns
+        # With memory enabled, older turns are recalled through the context builder
+        # instead of being replayed in full on every call
+        self.max_history_turns = max_history_turns
+        # Run the tool calls of one response concurrently when they are all read-only
+        # (results are still recorded in call order)
+        self.enable_parallel_tool_execution = enable_parallel_tool_execution
+        # One pool for the coordinator's lifetime; it starts threads on demand, up to max_parallel_tools
+        self._tool_executor = ThreadPoolExecutor(
+            max_workers=max_parallel_tools, thread_name_prefix="miyori-tool"
+        ) if enable_parallel_tool_execution else None
+
+        # Debug logs are written by a background thread; only the latest payload per file is kept
+        self._pending_logs: Dict[str, Any] = {}
+        self._pending_appends: Dict[str, List[Any]] = {}
+        self._log_lock = threading.Lock()
+        self._log_ready = threading.Event()
+        self._log_thread: Optional[threading.Thread] = None
+        # History sequence range already written to history.jsonl
+        self._logged_first = 0
+        self._logged_upto = 0
 
     def run(
         self,
@@ -46,7 +97,9 @@ class LLMCoordinator:
         Main orchestration loop.
         """
         
-        # Retrieve memory context (if enabled)
+        # Retrieve memory context (if enabled). This runs once per run(), not per tool turn, and
+        # reads memories the async stream pre-fetched from the conversation so far, so it is cheap
+        # even for short prompts; skipping or caching it by prompt would drop or stale the context.
         memory_summary = ""
         if context_builder:
             try:
@@ -55,19 +108,23 @@ class LLMCoordinator:
                 print(f"LLMCoordinator: Memory retrieval failed: {e}")
 
         # Build contextualized prompt
-        context_prefix = ""
-        if memory_summary:
-            context_prefix += f", {memory_summary}"
+        context_prefix = memory_summary or ""
         
         # Log context prefix
         self._log_to_file("prefix.log", context_prefix)
         
         # 4. Add ORIGINAL user message to history with source prefix
-        prefixed_prompt = f"({source} input)]: {prompt}"
+        prefixed_prompt = f"[user ({source} input)]: {prompt}"
         self.chat_history.add_message("user", prefixed_prompt)
+        if context_builder is not None and self.max_history_turns:
+            self.chat_history.keep_last_turns(self.max_history_turns)
         
+        # Calls to these tools may run concurrently; see _execute_tool_calls
+        read_only_tools = frozenset(tool.name for tool in tools if getattr(tool, "read_only", False))
+
         turn_count = 0
-        full_response_text = []
+        # Response text is only collected when something will store the turn
+        full_response_text: Optional[List[str]] = [] if store_turn_callback else None
         
         try:
             # Start tool calling / agentic loop
@@ -97,46 +154,47 @@ class LLMCoordinator:
                     print(f"--- Agentic Iteration {agentic_state.iteration}/{agentic_state.max_iterations} ---")
                 
                 # 3. BUILD CONTEXT
-                history = self.chat_history.get_history().copy()
+                # get_history() hands back a fresh list, so it can be patched below without copying again
+                history = self.chat_history.get_history()
+                # Log new history entries to file for debugging, before the per-call context is patched in
+                self._log_history_delta(history)
                 
                 # Build agentic context if active
                 agentic_prefix = ""
                 if agentic_state and agentic_state.is_active:
                     agentic_prefix = self._build_agentic_context(agentic_state)
 
-                # Find the most recent user prompt in history to prepend context to it
-                for i in range(len(history) - 1, -1, -1):
-                    if history[i]["role"] == "user":
-                        # Create a copy of the message so we don't modify the one in history
-                        history[i] = history[i].copy()
-                        content = history[i]["content"]
-                        
-                        # Combine contexts
-                        # Order: Memory Context -> Agentic State -> User Prompt
-                        full_prefix = ""
-                        if context_prefix:
-                            full_prefix += f"{context_prefix}\n\n"
-                        if agentic_prefix:
-                            full_prefix += f"{agentic_prefix}\n\n"
-                        
-                        history[i]["content"] = f"{full_prefix}[user {content}"
-                        break
+                # Prepend context to the most recent user prompt in history.
+                # The memory block is rebuilt every run and the agentic block changes per
+                # iteration, so they ride on the newest user turn: everything before it stays
+                # byte-identical between calls and remains eligible for provider prefix caching.
+                # Order: Memory Context -> Agentic State -> User Prompt
+                parts = [part for part in (context_prefix, agentic_prefix) if part]
+                i = self.chat_history.last_user_index()
+                if parts and i is not None:
+                    # Create a copy of the message so we don't modify the one in history
+                    history[i] = history[i].copy()
+                    parts.append(history[i]["content"])
+                    history[i]["content"] = "\n\n".join(parts)
                 
                 # 4. GET RESPONSE
                 provider_messages = self._translate_to_provider(history)
-                # Log history to file for debugging
-                self._log_to_file("history.log", history)
                 
                 try:
-                    response = self._call_provider_api(provider_messages, generate_config)
+                    if self._stream_provider_api is not None:
+                        # Text reaches on_chunk as it arrives; thoughts are printed by _consume_stream
+                        parsed = self._consume_stream(provider_messages, generate_config, on_chunk, interrupt_check)
+                        streamed = True
+                    else:
+                        response = self._call_provider_api(provider_messages, generate_config)
+                        parsed = self._parse_provider_response(response)
+                        streamed = False
                 except Exception as e:
                     print(f"LLMCoordinator: API call failed: {e}")
                     if agentic_state:
                         agentic_state.reset()
                     break
                     
-                # Parse response
-                parsed = self._parse_provider_response(response)
                 text = parsed.get("text", "")
                 thought = parsed.get("thought", "")
                 tool_calls = parsed.get("tool_calls", [])
@@ -148,8 +206,21 @@ class LLMCoordinator:
 
                 # Stream text chunks
                 if text:
-                    full_response_text.append(text)
-                    on_chunk(text)
+                    if full_response_text is not None:
+                        full_response_text.append(text)
+                    if not streamed:
+                        on_chunk(text)
+
+                if parsed.get("interrupted"):
+                    # Keep what was already said; the tool calls of a cut-off response are not run
+                    if not parsed.get("failed"):
+                        print("LLMCoordinator: Interrupt requested, stopping generation.")
+                    if text:
+                        self.chat_history.add_message("miyori", text)
+                        self._store_turn(store_turn_callback, prompt, full_response_text)
+                    if agentic_state:
+                        agentic_state.reset()
+                    break
                 
                 # 5. HANDLE TOOL CALLS
                 if tool_calls:
@@ -157,22 +228,16 @@ class LLMCoordinator:
                     self.chat_history.add_message("miyori", text, tool_calls=tool_calls)
                     
                     # Execute all tool calls
-                    for tc in tool_calls:
-                        tc_id = tc["id"]
-                        tc_name = tc["name"]
-                        tc_args = tc["arguments"]
-                        
-                        # Execute via callback
+                    tool_results = []
+                    try:
                         # Note: on_tool_call might raise AgenticExitSignal
-                        result = on_tool_call(tc_name, tc_args)
-                        
-                        # Store tool result in history
-                        self.chat_history.add_message(
-                            "tool", 
-                            result, 
-                            name=tc_name, 
-                            tool_call_id=tc_id
-                        )
+                        for tc, result in self._execute_tool_calls(tool_calls, on_tool_call, read_only_tools):
+                            tool_results.append(
+                                {"role": "tool", "content": result, "name": tc["name"], "tool_call_id": tc["id"]}
+                            )
+                    finally:
+                        # Store tool results in history in one batch (including any completed before an exit signal)
+                        self.chat_history.add_messages(tool_results)
                     
                     # Increment agentic iteration if we just executed tools in agentic mode
                     if agentic_state and agentic_state.is_active:
@@ -199,11 +264,7 @@ class LLMCoordinator:
                         self.chat_history.add_message("miyori", text)
                         
                         # Trigger memory storage if callback provided
-                        if store_turn_callback:
-                            try:
-                                store_turn_callback(prompt, "".join(full_response_text))
-                            except Exception as e:
-                                print(f"LLMCoordinator: Memory storage failed: {e}")
+                        self._store_turn(store_turn_callback, prompt, full_response_text)
                         break
         
         except AgenticExitSignal as aes:
@@ -221,43 +282,249 @@ class LLMCoordinator:
             if agentic_state:
                 agentic_state.reset()
 
+    @staticmethod
+    def _store_turn(
+        store_turn_callback: Optional[Callable[[str, str], Any]],
+        prompt: str,
+        response_parts: Optional[List[str]]
+    ) -> None:
+        """Hand the finished (or cut-off) turn to the memory store callback, if any."""
+        if store_turn_callback is None or response_parts is None:
+            return
+        try:
+            store_turn_callback(prompt, "".join(response_parts))
+        except Exception as e:
+            print(f"LLMCoordinator: Memory storage failed: {e}")
+
     def _strip_metadata(self, data: Any) -> Any:
         """
-        Recursively strip metadata keys from the data.
+        Strip metadata keys from the data at any depth.
+        Never modifies the input: containers with nothing to strip beneath them are
+        returned as-is, so only the path down to a stripped key is copied.
+        Walks an explicit stack, so deeply nested payloads can't hit the recursion limit.
         """
-        if isinstance(data, dict):
-            return {
-                k: self._strip_metadata(v)
-                for k, v in data.items()
-                if k not in self.METADATA_KEYS_TO_STRIP
-            }
-        elif isinstance(data, list):
-            return [self._strip_metadata(item) for item in data]
-        else:
+        strip = self.METADATA_KEYS_TO_STRIP
+        if not strip or not isinstance(data, (dict, list)):
             return data
 
-    def _log_to_file(self, filename: str, data: Any):
+        # Frame: [container, its (key, value) iterator, copy once something beneath changed, key in parent]
+        stack = [[data, self._children(data), None, None]]
+        while True:
+            frame = stack[-1]
+            node = frame[0]
+            is_dict = isinstance(node, dict)
+            for key, value in frame[1]:
+                if is_dict and key in strip:
+                    if frame[2] is None:
+                        frame[2] = dict(node)
+                    del frame[2][key]
+                elif isinstance(value, (dict, list)):
+                    stack.append([value, self._children(value), None, key])
+                    break
+            else:
+                stack.pop()
+                stripped = frame[2]
+                if not stack:
+                    return node if stripped is None else stripped
+                if stripped is not None:
+                    parent = stack[-1]
+                    if parent[2] is None:
+                        parent[2] = dict(parent[0]) if isinstance(parent[0], dict) else list(parent[0])
+                    parent[2][frame[3]] = stripped
+
+    @staticmethod
+    def _children(node: Any):
+        return iter(node.items()) if isinstance(node, dict) else enumerate(node)
+
+    def _consume_stream(
+        self,
+        provider_messages: Any,
+        generate_config: Any,
+        on_chunk: Callable[[str], None],
+        interrupt_check: Optional[Callable[[], bool]]
+    ) -> Dict[str, Any]:
         """
-        Generic logger for LLM coordinator.
+        Drive the streaming provider callback, forwarding text to on_chunk as it arrives.
+        Returns the assembled response in the same shape as _parse_provider_response, with
+        thoughts already printed and "interrupted" set if interrupt_check fired mid-stream.
+        If the stream fails after text was already passed to on_chunk, the error is printed and
+        the partial response is returned with "interrupted" and "failed" set, so what was said is
+        still recorded; a failure before any text raises as the blocking call would.
         """
+        text_parts: List[str] = []
+        thought_parts: List[str] = []
+        tool_calls: List[Dict[str, Any]] = []
+        interrupted = False
+        failed = False
+
+        stream_provider_api = self._stream_provider_api
+        assert stream_provider_api is not None, "_consume_stream needs a stream_provider_api_callback"
+        stream = stream_provider_api(provider_messages, generate_config)
         try:
-            log_dir = "logs"
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir)
-            
-            log_path = os.path.join(log_dir, filename)
-            
-            # Strip metadata if it's a structural log
-            if isinstance(data, (dict, list)):
-                data = self._strip_metadata(data)
-            
-            with open(log_path, "w", encoding="utf-8") as f:
-                if isinstance(data, (dict, list)):
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                else:
-                    f.write(str(data))
+            for delta in stream:
+                thought = delta.get("thought")
+                if thought:
+                    thought_parts.append(thought)
+                text = delta.get("text")
+                if text:
+                    if thought_parts:
+                        # Output thoughts to terminal silently, do not send to on_chunk (TTS/client)
+                        print(f"\nmiyori (thinking): {''.join(thought_parts)}")
+                        thought_parts.clear()
+                    text_parts.append(text)
+                    on_chunk(text)
+                tool_calls.extend(delta.get("tool_calls") or ())
+                if interrupt_check and interrupt_check():
+                    interrupted = True
+                    break
         except Exception as e:
-            print(f"LLMCoordinator: Failed to log {filename}: {e}")
+            if not text_parts:
+                raise
+            print(f"LLMCoordinator: API call failed mid-stream: {e}")
+            interrupted = failed = True
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        if thought_parts:
+            print(f"\nmiyori (thinking): {''.join(thought_parts)}")
+        return {
+            "text": "".join(text_parts),
+            "thought": "",
+            "tool_calls": tool_calls,
+            "interrupted": interrupted,
+            "failed": failed
+        }
+
+    def _execute_tool_calls(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        on_tool_call: Callable,
+        read_only_tools: frozenset = frozenset()
+    ):
+        """
+        Yield (tool_call, result) in call order.
+        If every call is to a read-only tool they run on the coordinator's thread pool, so a
+        turn costs its slowest tool rather than the sum. Otherwise they run one at a time: a later call may
+        depend on an earlier one (terminal "cd" then "make"), and nothing after a call that
+        raises (e.g. exit_loop's AgenticExitSignal) is started.
+        An exception from a call is raised when its turn comes up.
+        """
+        executor = self._tool_executor
+        if (
+            executor is None
+            or not self.enable_parallel_tool_execution
+            or len(tool_calls) < 2
+            or not all(tc["name"] in read_only_tools for tc in tool_calls)
+        ):
+            for tc in tool_calls:
+                yield tc, on_tool_call(tc["name"], tc["arguments"])
+            return
+
+        futures = [executor.submit(on_tool_call, tc["name"], tc["arguments"]) for tc in tool_calls]
+        for tc, future in zip(tool_calls, futures):
+            yield tc, future.result()
+
+    def close(self):
+        """Shut down the tool thread pool. The coordinator can't run parallel tool calls afterwards."""
+        if self._tool_executor is not None:
+            self._tool_executor.shutdown(wait=True, cancel_futures=True)
+
+    def _log_to_file(self, filename: str, data: Any):
+        """
+        Generic logger for LLM coordinator.
+        Hands the payload to the background writer so serialization and file I/O
+        stay off the request path. Each file is a snapshot, so a newer payload
+        replaces one that hasn't been written yet.
+        """
+        with self._log_lock:
+            self._pending_logs[filename] = data
+        self._wake_log_writer()
+
+    def _append_log(self, filename: str, records: List[Any]):
+        """Queue records to be appended to a JSON-lines log, in order."""
+        with self._log_lock:
+            self._pending_appends.setdefault(filename, []).extend(records)
+        self._wake_log_writer()
+
+    def _log_history_delta(self, history: List[Dict[str, Any]]):
+        """
+        Append only the messages not yet logged to logs/history.jsonl.
+        Trims and clears are recorded as event lines, so the file can be replayed
+        into the chat history without rewriting it every turn. `history` must be the
+        unpatched get_history() list: the memory and agentic blocks added to the newest
+        user turn change per call and are logged separately (prefix.log).
+        """
+        first, end = self.chat_history.seq_range()
+        records: List[Any] = []
+        if end < self._logged_upto or first < self._logged_first:
+            records.append({"_event": "clear"})
+            self._logged_first = self._logged_upto = 0
+        if first > self._logged_first:
+            records.append({"_event": "trim", "removed": first - self._logged_first})
+            self._logged_first = first
+        start = max(self._logged_upto, first)
+        records.extend(history[start - first:end - first])
+        self._logged_upto = end
+        if records:
+            self._append_log("history.jsonl", records)
+
+    def reset_history_log(self):
+        """Start logs/history.jsonl afresh, e.g. when a new conversation begins."""
+        with self._log_lock:
+            # Snapshots are written before appends, so the empty file lands before any later records
+            self._pending_appends.pop("history.jsonl", None)
+            self._pending_logs["history.jsonl"] = ""
+            self._logged_first, self._logged_upto = self.chat_history.seq_range()
+        self._wake_log_writer()
+
+    def _wake_log_writer(self):
+        with self._log_lock:
+            if self._log_thread is None:
+                self._log_thread = threading.Thread(
+                    target=self._log_writer, name="miyori-llm-log", daemon=True
+                )
+                self._log_thread.start()
+        self._log_ready.set()
+
+    def _log_writer(self):
+        log_dir = "logs"
+        while True:
+            self._log_ready.wait()
+            self._log_ready.clear()
+            with self._log_lock:
+                pending, self._pending_logs = self._pending_logs, {}
+                appends, self._pending_appends = self._pending_appends, {}
+
+            try:
+                os.makedirs(log_dir, exist_ok=True)
+            except OSError as e:
+                print(f"LLMCoordinator: Failed to create {log_dir}: {e}")
+
+            for filename, data in pending.items():
+                try:
+                    log_path = os.path.join(log_dir, filename)
+
+                    # Strip metadata if it's a structural log
+                    if isinstance(data, (dict, list)):
+                        data = self._strip_metadata(data)
+
+                    with open(log_path, "wb") as f:
+                        if isinstance(data, (dict, list)):
+                            f.write(_log_dumps(data, indent=True))
+                        else:
+                            f.write(str(data).encode("utf-8"))
+                except Exception as e:
+                    print(f"LLMCoordinator: Failed to log {filename}: {e}")
+
+            for filename, records in appends.items():
+                try:
+                    lines = [_log_dumps(self._strip_metadata(record)) for record in records]
+                    with open(os.path.join(log_dir, filename), "ab") as f:
+                        f.write(b"\n".join(lines) + b"\n")
+                except Exception as e:
+                    print(f"LLMCoordinator: Failed to log {filename}: {e}")
 
     def _build_agentic_context(self, state: Any) -> str:
         """Constructs the agentic state context block."""
@@ -278,7 +545,11 @@ class LLMCoordinator:
                 lines.append(f"Last Output (truncated): {state.last_output}")
                 
         if state.modified_files:
-            lines.append(f"Files Modified This Session: {', '.join(state.modified_files)}")
+            # Re-sent every iteration, so only the most recent files are listed
+            files = state.modified_files[-_MAX_LISTED_FILES:]
+            earlier = len(state.modified_files) - len(files)
+            listed = ", ".join(files) + (f" (+{earlier} earlier)" if earlier else "")
+            lines.append(f"Files Modified This Session: {listed}")
             
         lines.append("[You are acting autonomously. Call 'exit_loop' when finished or if impossible.]")
         
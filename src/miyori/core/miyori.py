@@ -1,3 +1,4 @@
+import reprlib
 import time
 from typing import Dict, Any, Callable, List, Optional
 from miyori.interfaces.speech_input import ISpeechInput
@@ -8,6 +9,14 @@ from miyori.utils.config import Config
 from miyori.core.state_manager import StateManager
 from miyori.core.agentic_state import AgenticState
 
+_EXIT_WORDS = frozenset(("exit", "goodbye"))
+
+# Bounded repr for echoing tool parameters (file contents, long commands) to the console
+_PARAM_REPR = reprlib.Repr()
+_PARAM_REPR.maxstring = 200
+_PARAM_REPR.maxother = 200
+_PARAM_REPR.maxdict = _PARAM_REPR.maxlist = 20
+
 class MiyoriCore:
     def __init__(self, 
                  speech_output: ISpeechOutput,
@@ -21,6 +30,7 @@ class MiyoriCore:
         self.tool_registry = tool_registry
         self.agentic_state = agentic_state or AgenticState()
         
+        # time.monotonic() of the last input, or 0 when asleep
         self.last_interaction_time = 0
         # Load config for active listen timeout
         self.active_listen_timeout = Config.data.get("speech_input", {}).get("active_listen_timeout", 30)
@@ -37,15 +47,16 @@ class MiyoriCore:
         print(f"user ({source}): {text}")
         
         # Update interaction time for both voice and text
-        self.last_interaction_time = time.time()
+        self.last_interaction_time = time.monotonic()
         
         # Handle special commands
-        if "go to sleep" in text.lower():            
+        lowered = text.lower()
+        if "go to sleep" in lowered:            
             self.last_interaction_time = 0
             on_chunk("ok goodnight")
             return
         
-        if set(['exit', 'goodbye']).intersection(text.lower().split()):
+        if not _EXIT_WORDS.isdisjoint(lowered.split()):
             on_chunk("Goodbye!")
             return
         
@@ -70,19 +81,17 @@ class MiyoriCore:
         
         def on_tool_call(tool_name: str, parameters: Dict[str, Any]) -> str:
             """Execute tool and return result."""
-            print(f"🔧 AI requested tool: {tool_name}")
-            print(f"   Parameters: {parameters}")
+            # One print per line group so concurrently running tools don't interleave their banners
+            print(f"🔧 AI requested tool: {tool_name}\n   Parameters: {_PARAM_REPR.repr(parameters)}")
             
             with logger.capture_session() as buffer:
                 result = self.tool_registry.execute(tool_name, **parameters)
                 logs = buffer.getvalue().strip()
             
+            print(f"✓ Tool result: {result[:100]}...")
             if logs:
-                print(f"✓ Tool result: {result[:100]}...")
                 return f"TOOL LOGS:\n{logs}\n\nTOOL RESULT:\n{result}"
-            else:
-                print(f"✓ Tool result: {result[:100]}...")
-                return result
+            return result
         
         # Get all registered tools
         tools = self.tool_registry.get_all()
@@ -98,8 +107,13 @@ class MiyoriCore:
             agentic_state=self.agentic_state
         )
 
-    def needs_wake_word(self) -> bool:
-        """Determine if wake word is required for voice input."""
+    def needs_wake_word(self, now: Optional[float] = None) -> bool:
+        """
+        Determine if wake word is required for voice input.
+        `now` is a time.monotonic() reading, for callers that already took one.
+        """
         if self.last_interaction_time == 0:
             return True
-        return (time.time() - self.last_interaction_time) >= self.active_listen_timeout
+        if now is None:
+            now = time.monotonic()
+        return (now - self.last_interaction_time) >= self.active_listen_timeout
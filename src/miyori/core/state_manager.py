@@ -1,5 +1,5 @@
 from enum import Enum
-from threading import Lock
+from threading import Event, Lock
 from typing import Optional
 
 class SystemState(Enum):
@@ -11,7 +11,8 @@ class StateManager:
     def __init__(self):
         self._state = SystemState.IDLE
         self._lock = Lock()
-        self._interrupt_flag = False
+        # Polled between response chunks, so it is an Event rather than a flag behind _lock
+        self._interrupt = Event()
     
     def get_state(self) -> SystemState:
         with self._lock:
@@ -34,15 +35,12 @@ class StateManager:
     
     def request_interrupt(self) -> None:
         """Set interrupt flag for LLM to check."""
-        with self._lock:
-            self._interrupt_flag = True
+        self._interrupt.set()
     
     def clear_interrupt(self) -> None:
         """Clear interrupt flag."""
-        with self._lock:
-            self._interrupt_flag = False
+        self._interrupt.clear()
     
     def should_interrupt(self) -> bool:
         """Check if interrupt was requested."""
-        with self._lock:
-            return self._interrupt_flag
+        return self._interrupt.is_set()
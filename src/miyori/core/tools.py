@@ -17,6 +17,7 @@ class Tool:
     description: str
     parameters: List[ToolParameter]
     function: Callable[..., str]  # The actual function to execute
+    read_only: bool = False  # No side effects or shared state: safe to run alongside other read-only calls
     
     def execute(self, **kwargs) -> str:
         """Execute the tool's function."""
@@ -1,6 +1,6 @@
 from google import genai
 from google.genai import types
-from typing import Callable, List, Dict, Any, Union, Optional
+from typing import Callable, List, Dict, Any, Union, Optional, Tuple
 import asyncio
 import threading
 import time
@@ -100,6 +100,10 @@ class GoogleAIBackend(ILLMBackend):
             self.client = None
 
         self.google_tools = None
+        # Translation caches, see _translate_to_provider_format:
+        # id(message) -> (message, parts) and message ids of a group -> (messages, Content)
+        self._parts_cache: Dict[int, Tuple[Dict, List[types.Part]]] = {}
+        self._content_cache: Dict[Tuple[int, ...], Tuple[List[Dict], Optional[types.Content]]] = {}
         
         # LLM Limits and Coordination
         # around 8:1 ratio for token limit to chunk size is sensible
@@ -119,7 +123,9 @@ class GoogleAIBackend(ILLMBackend):
             call_provider_api_callback=self._call_provider_api,
             parse_provider_response_callback=self._parse_provider_response,
             format_tool_result_callback=self._format_tool_result,
-            max_tool_turns=self.MAX_TOOL_TURNS
+            max_tool_turns=self.MAX_TOOL_TURNS,
+            max_history_turns=Config.data.get("memory", {}).get("max_history_turns"),
+            stream_provider_api_callback=self._stream_provider_api
         )
         self.token_monitor = TokenMonitor(
             window_seconds=60, 
@@ -245,14 +251,20 @@ class GoogleAIBackend(ILLMBackend):
         """Resets the conversation history."""
         print("Resetting conversation context...")
         self.chat_history.clear()
+        self.coordinator.reset_history_log()
         # Clear async memory stream context
         if hasattr(self, 'async_memory_stream'):
             self.async_memory_stream._recent_turns.clear()
 
     async def _cleanup_async_memory(self):
-        """Cleanup async memory stream."""
+        """Cleanup async memory stream and the coordinator's tool threads."""
+        self.coordinator.close()
         if hasattr(self, 'async_memory_stream'):
             await self.async_memory_stream.stop()
+        if hasattr(self, 'episodic_manager'):
+            await self.episodic_manager.queue.stop()
+        if hasattr(self, 'store'):
+            self.store.close()
 
     def llm_chat(
         self,
@@ -316,6 +328,12 @@ class GoogleAIBackend(ILLMBackend):
 
     def _translate_to_provider_format(self, messages: List[Dict]) -> List[types.Content]:
         """Converts internal format to Google's Content format, grouping adjacent messages with same role."""
+        # History messages are never mutated once added, so their translations are reused across
+        # calls: whole Contents for unchanged groups, parts for messages in a group that changed.
+        # Entries hold the messages themselves so a recycled id() can't hit a stale entry, and the
+        # caches are rebuilt from this call's messages so trimmed ones are released.
+        previous_parts, previous_contents = self._parts_cache, self._content_cache
+        parts_cache, content_cache = {}, {}
         provider_messages = []
         i = 0
         while i < len(messages):
@@ -324,52 +342,118 @@ class GoogleAIBackend(ILLMBackend):
             current_provider_role = "model" if msg["role"] == "miyori" else "user"
             
             # Group consecutive messages that share the same provider role
-            group_parts = []
+            group = []
             while i < len(messages):
                 m = messages[i]
                 m_provider_role = "model" if m["role"] == "miyori" else "user"
                 
                 if m_provider_role != current_provider_role:
                     break
-                
-                # Add parts from this message
-                if m.get("content"):
-                    if m["role"] == "tool":
-                        # Tool results use function_response part
-                        group_parts.append(types.Part.from_function_response(
-                            name=m["name"],
-                            response={"result": m["content"]}
-                        ))
-                    else:
-                        # Regular text part
-                        group_parts.append(types.Part.from_text(text=m["content"]))
-                
-                if m["role"] == "miyori" and m.get("tool_calls"):
-                    for tc in m["tool_calls"]:
-                        # Include thought_signature if present (required for some Gemini models)
-                        group_parts.append(types.Part(
-                            function_call=types.FunctionCall(
-                                name=tc["name"],
-                                args=tc["arguments"]
-                            ),
-                            thought_signature=tc.get("thought_signature")
-                        ))
-                
+                group.append(m)
                 i += 1
-            
-            if group_parts:
-                provider_messages.append(types.Content(
+
+            key = tuple(map(id, group))
+            cached = previous_contents.get(key)
+            if cached is not None and all(a is b for a, b in zip(cached[0], group)):
+                content = cached[1]
+                for m in group:
+                    hit = previous_parts.get(id(m))
+                    if hit is not None:
+                        parts_cache[id(m)] = hit
+            else:
+                group_parts = []
+                for m in group:
+                    hit = previous_parts.get(id(m))
+                    parts = hit[1] if hit is not None and hit[0] is m else self._message_parts(m)
+                    parts_cache[id(m)] = (m, parts)
+                    group_parts.extend(parts)
+                content = types.Content(
                     role=current_provider_role, 
                     parts=group_parts
-                ))
+                ) if group_parts else None
+            content_cache[key] = (group, content)
+            
+            if content is not None:
+                provider_messages.append(content)
         
+        self._parts_cache, self._content_cache = parts_cache, content_cache
         return provider_messages
 
+    def _message_parts(self, m: Dict) -> List[types.Part]:
+        """Provider parts for a single internal message."""
+        parts = []
+        if m.get("content"):
+            if m["role"] == "tool":
+                # Tool results use function_response part
+                parts.append(types.Part.from_function_response(
+                    name=m["name"],
+                    response={"result": m["content"]}
+                ))
+            else:
+                # Regular text part
+                parts.append(types.Part.from_text(text=m["content"]))
+        
+        if m["role"] == "miyori" and m.get("tool_calls"):
+            for tc in m["tool_calls"]:
+                # Include thought_signature if present (required for some Gemini models)
+                parts.append(types.Part(
+                    function_call=types.FunctionCall(
+                        name=tc["name"],
+                        args=tc["arguments"]
+                    ),
+                    thought_signature=tc.get("thought_signature")
+                ))
+        return parts
+
+    def _require_client(self) -> genai.Client:
+        """The API client; calls can't be made without one (no llm.api_key configured)."""
+        client = self.client
+        if client is None:
+            raise RuntimeError("Google AI client is not configured (missing llm.api_key)")
+        return client
+
     def _call_provider_api(self, provider_messages: List[types.Content], config: types.GenerateContentConfig) -> Any:
         """Makes stateless API call to Google's generate_content."""
+        # 1-2. Estimate incoming tokens and wait for window space
+        self._reserve_tokens(provider_messages)
+
+        # 3. Execute API call
+        response = self._require_client().models.generate_content(
+            model=self.model_name,
+            contents=provider_messages,
+            config=config
+        )
+
+        # 4. Record actual usage metadata for future calculations
+        if hasattr(response, 'usage_metadata') and response.usage_metadata:
+            self.token_monitor.record_usage(response.usage_metadata.total_token_count)
+
+        return response
+
+    def _stream_provider_api(self, provider_messages: List[types.Content], config: types.GenerateContentConfig):
+        """Streaming variant of _call_provider_api; yields each chunk parsed like a full response."""
+        self._reserve_tokens(provider_messages)
+
+        usage = None
+        try:
+            for chunk in self._require_client().models.generate_content_stream(
+                model=self.model_name,
+                contents=provider_messages,
+                config=config
+            ):
+                # Usage metadata is cumulative; the last chunk that carries it has the total
+                if getattr(chunk, 'usage_metadata', None):
+                    usage = chunk.usage_metadata
+                yield self._parse_provider_response(chunk)
+        finally:
+            if usage is not None and usage.total_token_count:
+                self.token_monitor.record_usage(usage.total_token_count)
+
+    def _reserve_tokens(self, provider_messages: List[types.Content]) -> None:
+        """Estimate the request's tokens and block until the rate window has room for them."""
         # 1. Estimate incoming tokens for predictive backoff
         try:
-            estimate = self.client.models.count_tokens(
+            estimate = self._require_client().models.count_tokens(
                 model=self.model_name,
                 contents=provider_messages
             )
@@ -382,19 +466,6 @@ class GoogleAIBackend(ILLMBackend):
         # 2. Calculate and wait for necessary window space
         self.token_monitor.wait_until_available(incoming_tokens)
 
-        # 3. Execute API call
-        response = self.client.models.generate_content(
-            model=self.model_name,
-            contents=provider_messages,
-            config=config
-        )
-
-        # 4. Record actual usage metadata for future calculations
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            self.token_monitor.record_usage(response.usage_metadata.total_token_count)
-
-        return response
-
     def _parse_provider_response(self, response: Any) -> Dict:
         """Extracts text, thought, and tool calls from Google response."""
         text_parts = []
@@ -45,6 +45,9 @@ def _kokoro_worker(text_queue, audio_queue, pipeline, voice, speed):
 
 class KokoroTTSOutput(ISpeechOutput):
     _TTS_STRIP_CHARS = ['*']
+    # Deletion table for str.translate; the strip list holds single characters
+    _STRIP_TABLE = str.maketrans('', '', ''.join(_TTS_STRIP_CHARS))
+    _SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
     def __init__(self):
         # Initialize pipeline (this might download weights)
         print("Initializing Kokoro pipeline... (this may download model weights)")
@@ -142,8 +145,7 @@ class KokoroTTSOutput(ISpeechOutput):
         if not text.strip():
             return
         
-        pattern = f"[{re.escape(''.join(self._TTS_STRIP_CHARS))}]"
-        sanitized_text = re.sub(pattern, '', text)
+        sanitized_text = text.translate(self._STRIP_TABLE)
         self._speech_pipeline.enqueue(sanitized_text)
 
     def _flush_internal(self) -> None:
@@ -156,7 +158,7 @@ class KokoroTTSOutput(ISpeechOutput):
         """
         Segments buffer into sentences and enqueues complete ones.
         """
-        parts = re.split(r'(?<=[.!?])\s+', self._buffer)
+        parts = self._SENT_SPLIT_RE.split(self._buffer)
         
         if len(parts) > 1:
             for part in parts[:-1]:
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, ContextManager
 
 class IMemoryStore(ABC):
     """Interface for cognitive memory storage backends."""
@@ -24,11 +24,48 @@ class IMemoryStore(ABC):
         """Search episodes by semantic similarity."""
         pass
 
+    @abstractmethod
+    def vector_search(
+        self,
+        table: str,
+        query_embedding: List[float],
+        limit: int,
+        status: Optional[str] = None,
+        min_confidence: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Rows of 'episodic_memory' or 'semantic_memory' most similar to the query, best first, with 'similarity'."""
+        pass
+
+    @abstractmethod
+    def list_recent_active(self, since: str, min_importance: float = 0.0, limit: int = 20) -> List[Dict[str, Any]]:
+        """List active episodes newer than an ISO timestamp, newest first."""
+        pass
+
     @abstractmethod
     def get_unconsolidated_episodes(self, status: str = 'active', limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get episodes that haven't been consolidated yet."""
         pass
 
+    @abstractmethod
+    def activate_episodes(self, embeddings: List[Tuple[str, Any]]) -> int:
+        """Store (episode_id, embedding) pairs and mark those episodes active in one write."""
+        pass
+
+    @abstractmethod
+    def set_episodes_status(self, episode_ids: List[str], status: str) -> int:
+        """Set the status of many episodes in one write."""
+        pass
+
+    @abstractmethod
+    def transaction(self) -> ContextManager[None]:
+        """Context manager that commits every write made inside it as one transaction."""
+        pass
+
+    @abstractmethod
+    def ensure_indexes(self) -> None:
+        """Create indexes needed only by consolidation (idempotent)."""
+        pass
+
     @abstractmethod
     def mark_episodes_consolidated(self, episode_ids: List[str]) -> bool:
         """Mark episodes as consolidated by setting consolidated_at timestamp."""
@@ -39,6 +76,11 @@ class IMemoryStore(ABC):
         """Store or update a semantic fact."""
         pass
 
+    @abstractmethod
+    def add_semantic_facts_bulk(self, facts: List[Dict[str, Any]]) -> List[str]:
+        """Store several semantic facts in one write; returns their IDs."""
+        pass
+
     @abstractmethod
     def get_semantic_facts(self, status: str = 'stable', limit: int = 10) -> List[Dict[str, Any]]:
         """Retrieve established facts about the user."""
@@ -6,13 +6,14 @@ from datetime import datetime
 from miyori.memory.memory_retriever import MemoryRetriever
 from miyori.utils.embeddings import EmbeddingService
 from miyori.utils.memory_logger import memory_logger
+from miyori.utils.executors import get_model_executor
 
 @dataclass
 class MemoryCache:
     """Cache entry for passive memory retrieval."""
     episodic_memories: List[Dict[str, Any]]
     semantic_facts: List[Dict[str, Any]]
-    context_embedding: List[float]  # Embedding of the context used to generate this cache
+    context_embedding: List[float]  # Unit-norm embedding of the context used to generate this cache
     timestamp: datetime
     context_text: str 
 
@@ -32,6 +33,8 @@ class AsyncMemoryStream:
 
         # Cache for next turn's memories
         self._cache: Optional[MemoryCache] = None
+        # Pre-built {'episodic', 'semantic'} view of _cache, swapped in whole on refresh
+        self._cached_snapshot: Optional[Dict[str, List[Dict[str, Any]]]] = None
 
         # Background task management
         self._task: Optional[asyncio.Task] = None
@@ -79,20 +82,20 @@ class AsyncMemoryStream:
         })
 
     def get_cached_memories(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
-        if not self._cache:
+        """Synchronous peek at the latest pre-fetched memories; safe to call from any thread."""
+        cache = self._cache
+        snapshot = self._cached_snapshot
+        if not cache or snapshot is None:
             memory_logger.log_event("cache_miss",{"reason":"no_cache"})
             return
 
         memory_logger.log_event("cache_hit", {
-            "episodic_count": len(self._cache.episodic_memories),
-            "semantic_count": len(self._cache.semantic_facts),
-            "cache_age_seconds": (datetime.now() - self._cache.timestamp).total_seconds()
+            "episodic_count": len(snapshot['episodic']),
+            "semantic_count": len(snapshot['semantic']),
+            "cache_age_seconds": (datetime.now() - cache.timestamp).total_seconds()
         })
         
-        return {
-                'episodic': self._cache.episodic_memories,
-                'semantic': self._cache.semantic_facts
-                }
+        return snapshot
 
     async def refresh_cache(self):
         try:
@@ -106,9 +109,11 @@ class AsyncMemoryStream:
                     })
                     return
             
-                new_embedding = self.embedding_service.embed(context_text)
+            loop = asyncio.get_running_loop()
+            if self._cache is not None:
+                new_embedding = await loop.run_in_executor(get_model_executor(), self.embedding_service.embed, context_text)
             else:
-                new_embedding = self.embedding_service.embed("context_text")
+                new_embedding = await loop.run_in_executor(get_model_executor(), self.embedding_service.embed, "context_text")
             
             episodic_memories = self.retriever.search_memories(
                 query_embedding=new_embedding,
@@ -130,6 +135,10 @@ class AsyncMemoryStream:
                 timestamp=datetime.now(),
                 context_text = context_text
             )
+            self._cached_snapshot = {
+                'episodic': episodic_memories,
+                'semantic': semantic_facts
+            }
 
             memory_logger.log_event("cache_refreshed", {
                 "episodic_count": len(self._cache.episodic_memories),
@@ -1,3 +1,4 @@
+import numpy as np
 from typing import List, Dict, Any
 from miyori.interfaces.memory import IMemoryStore
 from miyori.memory.scoring import ImportanceScorer
@@ -31,18 +32,17 @@ class MemoryBudget:
         # Rank by: similarity (not applicable here, use 1.0) * 0.5 + decayed_importance * 0.3 + recency * 0.2
         # But for pruning, we just care about decayed_importance and recency.
         
-        for mem in all_active:
-            importance = mem.get('importance', 0.5)
-            decayed_importance = ImportanceScorer.get_decayed_score(importance, mem['timestamp'])
-            
-            # Recency (using simpler calc for budget)
-            from datetime import datetime
-            timestamp = datetime.fromisoformat(mem['timestamp'])
-            age_days = (datetime.now() - timestamp).days
-            recency = 1.0 / (1 + age_days / 30)
-            
-            # Ranking score: 0.6*importance + 0.4*recency
-            mem['budget_rank'] = (decayed_importance * 0.6) + (recency * 0.4)
+        # Parse every timestamp in one call and score all episodes at once
+        age_days = ImportanceScorer.ages_in_days(mem['timestamp'] for mem in all_active)
+        importance = np.array([mem.get('importance', 0.5) for mem in all_active], dtype=np.float64)
+
+        decayed_importance = ImportanceScorer.get_decayed_scores(importance, age_days)
+        recency = 1.0 / (1 + age_days / 30)
+
+        # Ranking score: 0.6*importance + 0.4*recency
+        budget_rank = (decayed_importance * 0.6) + (recency * 0.4)
+        for mem, rank in zip(all_active, budget_rank.tolist()):
+            mem['budget_rank'] = rank
 
         # Sort by budget_rank (keep highest)
         all_active.sort(key=lambda x: x['budget_rank'], reverse=True)
@@ -50,8 +50,7 @@ class MemoryBudget:
         to_keep = all_active[:self.max_active]
         to_archive = all_active[self.max_active:]
         
-        for episode in to_archive:
-            self.store.update_episode(episode['id'], {'status': 'archived'})
+        self.store.set_episodes_status([episode['id'] for episode in to_archive], 'archived')
         
         memory_logger.log_event("budget_pruning", {
             "initial_count": len(all_active),
@@ -71,6 +71,9 @@ class ConfidenceManager:
         memory_logger.log_event("confidence_update_start", {"fact_count": len(facts)})
         
         # Step 1: Evidence accumulation for each fact
+        # Updates are collected per fact and written in one transaction after the scan,
+        # so the write lock isn't held across the evidence searches
+        pending_updates: Dict[str, Dict[str, Any]] = {}
         for fact in facts:
             if fact.get('embedding') is None:
                 continue
@@ -91,7 +94,7 @@ class ConfidenceManager:
                 existing_derived = fact.get('derived_from', [])
                 new_derived = list(set(existing_derived + supporting_episodes))
                 
-                self.store.update_semantic_fact(fact['id'], {
+                pending_updates.setdefault(fact['id'], {}).update({
                     'evidence_count': new_evidence_count,
                     'derived_from': new_derived,
                     'last_confirmed': datetime.now().isoformat()
@@ -103,8 +106,13 @@ class ConfidenceManager:
             
             # Update confidence if changed
             if abs(new_confidence - original_confidence) > 0.001:
-                self.store.update_semantic_fact(fact['id'], {'confidence': new_confidence})
+                pending_updates.setdefault(fact['id'], {})['confidence'] = new_confidence
                 stats["updated_count"] += 1
+
+        if pending_updates:
+            with self.store.transaction():
+                for fact_id, updates in pending_updates.items():
+                    self.store.update_semantic_fact(fact_id, updates)
         
         # Step 2: Detect contradictions between facts
         contradictions = self._detect_contradictions(facts)
@@ -370,14 +378,15 @@ Pairs to analyze:
         facts = self.store.get_all_active_facts()
         deprecated_count = 0
         
-        for fact in facts:
-            if fact['confidence'] < self.DEPRECATION_THRESHOLD:
-                self.store.update_semantic_fact(fact['id'], {'status': 'deprecated'})
-                deprecated_count += 1
-                memory_logger.log_event("fact_deprecated", {
-                    "fact_id": fact['id'],
-                    "fact": fact['fact'][:50],
-                    "confidence": fact['confidence']
-                })
+        with self.store.transaction():
+            for fact in facts:
+                if fact['confidence'] < self.DEPRECATION_THRESHOLD:
+                    self.store.update_semantic_fact(fact['id'], {'status': 'deprecated'})
+                    deprecated_count += 1
+                    memory_logger.log_event("fact_deprecated", {
+                        "fact_id": fact['id'],
+                        "fact": fact['fact'][:50],
+                        "confidence": fact['confidence']
+                    })
         
         return deprecated_count
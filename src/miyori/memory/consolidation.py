@@ -1,17 +1,37 @@
-from google import genai
-import json
 import numpy as np
 from sklearn.cluster import HDBSCAN
-#from sklearn.preprocessing import normalize
+from sklearn.decomposition import PCA
 from typing import List, Dict, Any, Tuple
 from miyori.interfaces.memory import IMemoryStore
 from miyori.memory.deep_layers import SemanticExtractor
+from miyori.memory.quantization import dequantize_int8
 from miyori.utils.config import Config
 
+__all__ = ['EpisodeClustering', 'ContradictionDetector', 'ConsolidationManager']
+
 class EpisodeClustering:
     def __init__(self):
         self.max_cluster_size = Config.data.get("memory", {}).get("max_semantic_extraction_batch_size", 50)
         self.min_cluster_size = Config.data.get("memory", {}).get("min_cluster_size", 3)
+        self.pca_components = Config.data.get("memory", {}).get("cluster_pca_components", 128)
+
+    def _reduce_dimensions(self, embeddings_array: np.ndarray) -> np.ndarray:
+        """
+        Project embeddings onto their top principal components before clustering.
+
+        Vectors are L2-normalized first so that euclidean distance in the reduced
+        space tracks cosine distance in the original space. When the batch has
+        fewer episodes than components the projection is lossless.
+        """
+        norms = np.linalg.norm(embeddings_array, axis=1, keepdims=True)
+        normalized = embeddings_array / np.where(norms > 0, norms, 1.0)
+
+        n_components = min(self.pca_components, normalized.shape[0], normalized.shape[1])
+        if n_components < 2 or n_components >= normalized.shape[1]:
+            return normalized
+
+        pca = PCA(n_components=n_components, random_state=42)
+        return pca.fit_transform(normalized)
 
     def cluster_episodes(self, episodes: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
         """
@@ -33,7 +53,12 @@ class EpisodeClustering:
         valid_episodes = []
 
         for episode in episodes:
-            if episode.get('embedding') is not None:
+            scale = episode.get('embedding_scale')
+            if episode.get('embedding_i8') is not None and scale is not None:
+                # Quantized copy is enough for relative distances; without a scale it is unusable
+                embeddings.append(dequantize_int8(episode['embedding_i8'], scale))
+                valid_episodes.append(episode)
+            elif episode.get('embedding') is not None:
                 # Handle different embedding formats
                 if isinstance(episode['embedding'], bytes):
                     # Convert bytes to numpy array (assuming float32)
@@ -54,13 +79,16 @@ class EpisodeClustering:
         # Convert to numpy array
         embeddings_array = np.array(embeddings)
 
-        # Perform HDBSCAN clustering
+        # Cluster in a reduced space; the raw embeddings stay on the episodes
+        reduced = self._reduce_dimensions(embeddings_array)
+
+        # Perform HDBSCAN clustering (euclidean on unit vectors ~ cosine)
         clusterer = HDBSCAN(
             min_cluster_size=self.min_cluster_size,
-            metric='cosine',
+            metric='euclidean',
             copy=False
         )
-        cluster_labels = clusterer.fit_predict(embeddings_array)
+        cluster_labels = clusterer.fit_predict(reduced)
 
         # Group episodes by cluster
         clusters = {}
@@ -158,6 +186,7 @@ class ConsolidationManager:
     async def perform_consolidation(self):
         """Nightly consolidation task using clustering for intelligent batching."""
         print("Starting Memory Consolidation...")
+        self.store.ensure_indexes()
 
         # 1. Get unconsolidated episodes
         episodes = self.store.get_unconsolidated_episodes(status='active')
@@ -1,5 +1,7 @@
-from typing import Any, Optional
-from datetime import datetime
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from miyori.utils.memory_logger import memory_logger
 
 def get_current_time_formatted() -> str:
     """Get current time formatted as '2025-12-24 19:47 (Wednesday evening)'."""
@@ -18,44 +20,95 @@ def get_current_time_formatted() -> str:
         time_of_day = "night"
     return f"[Current Time]: {date_str} {time_str} ({day_name} {time_of_day})\n\n"
 
-def count_tokens_approx(text: str) -> int:
-    """Approximate token count (chars / 4)."""
-    return len(text) // 4
+def count_tokens_approx(text: str, extra: int = 0) -> int:
+    """Approximate token count (chars / 4). `extra` counts trailing chars not in `text`."""
+    return (len(text) + extra) // 4
 
-def format_section(label: str, content: Any) -> str:
-    """Format a context section for the prompt."""
-    if not content:
-        return ""
+_WORD_RE = re.compile(r"\w+")
 
-    header = f"--- {label} ---"
+def _dedupe_jaccard(items: List[Dict[str, Any]], key: str, threshold: float = 0.85) -> List[Dict[str, Any]]:
+    """Drop items whose lowercased token set has Jaccard similarity >= threshold with an earlier kept item."""
+    kept = []
+    kept_tokens: List[frozenset] = []
+    for item in items:
+        tokens = frozenset(_WORD_RE.findall(str(item.get(key) or '').lower()))
+        if tokens and any(len(tokens & other) / len(tokens | other) >= threshold for other in kept_tokens):
+            continue
+        kept.append(item)
+        kept_tokens.append(tokens)
+    return kept
+
+def _format_timestamp(ts: Any) -> Optional[str]:
+    """Render an ISO timestamp as 'YYYY-MM-DD HH:MM:SS', or None if it can't be parsed."""
+    # Fast path: stored timestamps come from datetime.isoformat(), so slice instead of parsing
+    if (isinstance(ts, str) and len(ts) >= 19 and ts[4] == '-' and ts[7] == '-'
+            and ts[10] in 'T ' and ts[13] == ':' and ts[16] == ':'):
+        return f"{ts[:10]} {ts[11:19]}"
+    try:
+        return datetime.fromisoformat(ts).strftime("%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+def _fmt_facts(content: Any, max_chars: Optional[int] = None) -> str:
+    """Semantic facts, one bullet each."""
+    items = []
+    total = 0
+    for item in _dedupe_jaccard(content, 'fact'):
+        line = f"- {item.get('fact')}"
+        items.append(line)
+        total += len(line) + 1
+        if max_chars is not None and total > max_chars:
+            break
+    return "\n".join(items)
+
+def _fmt_episodic(content: Any, max_chars: Optional[int] = None) -> str:
+    """Episodic memories, prefixed with their timestamp when it parses."""
+    items = []
+    total = 0
+    for item in _dedupe_jaccard(content, 'summary'):
+        ts_str = _format_timestamp(item.get('timestamp', ''))
+        if ts_str:
+            line = f"[{ts_str}] {item.get('summary')}"
+        else:
+            line = f"{item.get('summary')}"
+        items.append(line)
+        total += len(line) + 1
+        if max_chars is not None and total > max_chars:
+            break
+    return "\n".join(items)
 
-    if label == 'FACTS':
-        # Semantic facts
-        items = [f"- {item.get('fact')}" for item in content]
-        body = "\n".join(items)
+def _fmt_default(content: Any, max_chars: Optional[int] = None) -> str:
+    """Pre-rendered text (e.g. tool-based memory search results) or anything else."""
+    return content if isinstance(content, str) else str(content)
 
-    elif label == 'RECENT' or label == 'RELEVANT' or label == 'EPISODIC':
-        # Episodic memories
-        items = []
-        for item in content:
-            ts = item.get('timestamp', '')
-            # Simple timestamp formatting if possible
-            try:
-                dt = datetime.fromisoformat(ts)
-                ts_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-                items.append(f"[{ts_str}] {item.get('summary')}")
-            except:
-                items.append(f"{item.get('summary')}")
-        body = "\n".join(items)
+# Section label -> body formatter; unlisted labels fall back to _fmt_default
+_SECTION_FORMATTERS = {
+    'FACTS': _fmt_facts,
+    'RECENT': _fmt_episodic,
+    'RELEVANT': _fmt_episodic,
+    'EPISODIC': _fmt_episodic,
+    'TOOL_RESULTS': _fmt_default,
+}
+
+def format_section(label: str, content: Any) -> str:
+    """Format a context section for the prompt."""
+    return format_section_with_tokens(label, content)[0]
 
-    elif label == 'TOOL_RESULTS':
-        # Tool-based memory search results
-        body = content if isinstance(content, str) else str(content)
+def format_section_with_tokens(label: str, content: Any, max_tokens: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Format a context section for the prompt and return it with its approximate token count.
 
-    else:
-        body = str(content)
+    With `max_tokens`, list sections stop formatting items once the body is
+    already past that size; those items could never survive truncation, so
+    the reported count is then only guaranteed to exceed `max_tokens`.
+    """
+    if not content:
+        return "", 0
 
-    return f"{header}\n{body}\n\n"
+    max_chars = max_tokens * 4 if max_tokens is not None else None
+    body = _SECTION_FORMATTERS.get(label, _fmt_default)(content, max_chars)
+    section_text = f"--- {label} ---\n{body}\n\n"
+    return section_text, count_tokens_approx(section_text)
 
 def truncate_to_budget(text: str, max_tokens: int) -> str:
     """Truncate text to fit token budget by removing entire items (paragraphs)."""
@@ -64,7 +117,7 @@ def truncate_to_budget(text: str, max_tokens: int) -> str:
     current_tokens = 0
 
     for item in items:
-        item_tokens = count_tokens_approx(item + '\n')
+        item_tokens = (len(item) + 1) >> 2
         if current_tokens + item_tokens <= max_tokens:
             result.append(item)
             current_tokens += item_tokens
@@ -74,12 +127,54 @@ def truncate_to_budget(text: str, max_tokens: int) -> str:
     return "\n".join(result)
 
 class ContextBuilder:
+    # Memory sections in display order: (label, target_tokens, tier)
+    _SECTION_SPECS = (
+        ('EPISODIC', 400, 2),
+        ('FACTS', 300, 3),
+    )
+
     def __init__(self, store, episodic_manager, async_memory_stream=None, token_budget=1500):
         self.store = store
         self.episodic_manager = episodic_manager
         self.async_memory_stream = async_memory_stream
         self.token_budget = token_budget
 
+    def _allocate_budget(self, sections: List[Tuple[str, str, int, int, int]]) -> List[int]:
+        """
+        Split the token budget across formatted sections.
+
+        Each section is first granted up to its target, in tier order. Whatever
+        budget is left is then shared among sections that still need more,
+        in proportion to their shortfall, so headroom unused by one section
+        is not wasted when another overflows its target.
+        """
+        allocations = [0] * len(sections)
+        remaining = self.token_budget
+
+        by_tier = sorted(range(len(sections)), key=lambda i: sections[i][4])
+        for i in by_tier:
+            _, _, tokens, target, _ = sections[i]
+            allocations[i] = min(tokens, target, max(remaining, 0))
+            remaining -= allocations[i]
+
+        shortfalls = {i: sections[i][2] - allocations[i] for i in by_tier if sections[i][2] > allocations[i]}
+        total_shortfall = sum(shortfalls.values())
+        if remaining > 0 and total_shortfall > 0:
+            surplus = remaining
+            for i, shortfall in shortfalls.items():
+                extra = min(shortfall, surplus * shortfall // total_shortfall)
+                allocations[i] += extra
+                remaining -= extra
+            # Hand out any rounding remainder in tier order
+            for i, shortfall in shortfalls.items():
+                if remaining <= 0:
+                    break
+                extra = min(sections[i][2] - allocations[i], remaining)
+                allocations[i] += extra
+                remaining -= extra
+
+        return allocations
+
     def build_context(self, user_message: str, tool_results: Optional[str] = None) -> str:
         """
         Assemble context using dual-mode memory retrieval.
@@ -88,46 +183,11 @@ class ContextBuilder:
             user_message: Current user message (for backward compatibility)
             tool_results: Results from active memory search tool (privileged budget)
         """
-        from miyori.utils.memory_logger import memory_logger
-
-        context_parts = []
-        tokens_used = 0
-
-        # 1. Tool Results (Privileged - up to 400 tokens)
-        if tool_results:
-            section_text = format_section('TOOL_RESULTS', tool_results)
-            section_tokens = count_tokens_approx(section_text)
-
-            # Tool results get priority allocation (up to 400 tokens)
-            tool_budget = min(400, self.token_budget // 3)  # Max 400 or 1/3 of total budget
-
-            if section_tokens <= tool_budget:
-                context_parts.append(section_text)
-                tokens_used += section_tokens
-                memory_logger.log_event("context_section", {
-                    "label": "TOOL_RESULTS",
-                    "tokens": section_tokens,
-                    "status": "full",
-                    "privileged": True
-                })
-            else:
-                # Truncate tool results if needed
-                truncated = truncate_to_budget(section_text, tool_budget)
-                if truncated.strip():
-                    context_parts.append(truncated + "\n\n")
-                    added_tokens = count_tokens_approx(truncated + "\n\n")
-                    tokens_used += added_tokens
-                    memory_logger.log_event("context_section", {
-                        "label": "TOOL_RESULTS",
-                        "tokens": added_tokens,
-                        "status": "truncated",
-                        "privileged": True
-                    })
-
+        # 1. Gather memories (cached pre-fetch, or synchronous fallback)
         cached_memories = None
         if self.async_memory_stream:
             try:
-                # This is now synchronous - just returns cached data
+                # Synchronous peek at the pre-built snapshot; no event loop involved
                 cached_memories = self.async_memory_stream.get_cached_memories()
             except Exception as e:
                 memory_logger.log_event("async_memory_access_error", {"error": str(e)})
@@ -145,16 +205,10 @@ class ContextBuilder:
             memory_logger.log_event("cache_miss_fallback", {})
 
             # Use recent high importance episodes instead of zero vector
-            from datetime import datetime, timedelta
             seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
             
             # Get recent episodes directly without vector search
-            all_episodes = self.store.search_episodes([0.0]*768, limit=100, status='active')
-            episodic_memories = [
-                e for e in all_episodes 
-                if e.get('timestamp', '') >= seven_days_ago 
-                and e.get('importance', 0) >= 0.7
-            ][:5]  # Limit to 5
+            episodic_memories = self.store.list_recent_active(seven_days_ago, min_importance=0.7, limit=5)
             
             # Get high-confidence facts
             all_facts = self.store.get_semantic_facts()
@@ -163,58 +217,58 @@ class ContextBuilder:
                 if f.get('confidence', 0) >= 0.5
             ][:5]  # Limit to 5
 
-        # 4. Regular Memory Sections (remaining budget)
-        remaining_budget = self.token_budget - tokens_used
-
-        sections = [
-            ('EPISODIC', episodic_memories, 400, False),
-            ('FACTS', semantic_facts, 300, False)
-        ]
+        # 2. Format every section up front: (label, text, tokens, target_tokens, tier)
+        # Tier 1 is privileged, higher tiers are granted budget after it.
+        # Sections are listed in display order.
+        sections = []
+        if tool_results:
+            # Tool results get priority allocation (max 400 or 1/3 of total budget)
+            tool_budget = min(400, self.token_budget // 3)
+            sections.append(('TOOL_RESULTS', *format_section_with_tokens('TOOL_RESULTS', tool_results), tool_budget, 1))
+        contents = {'EPISODIC': episodic_memories, 'FACTS': semantic_facts}
+        for label, target_tokens, tier in self._SECTION_SPECS:
+            content = contents[label]
+            if content:
+                # No section can be granted more than the whole budget, so don't format past it
+                sections.append((label, *format_section_with_tokens(label, content, self.token_budget), target_tokens, tier))
+
+        # 3. Allocate budget, then assemble in display order
+        allocations = self._allocate_budget(sections)
 
-        for label, content, target_tokens, required in sections:
-            if not content:
+        context_parts = []
+        tokens_used = 0
+        for (label, section_text, section_tokens, _, tier), allocated in zip(sections, allocations):
+            privileged = tier == 1
+            if section_tokens <= allocated:
+                context_parts.append(section_text)
+                tokens_used += section_tokens
+                memory_logger.log_event("context_section", {
+                    "label": label,
+                    "tokens": section_tokens,
+                    "status": "full",
+                    "privileged": privileged
+                })
                 continue
 
-            section_text = format_section(label, content)
-            section_tokens = count_tokens_approx(section_text)
-
-            if required:
-                # Ensure required sections fit
-                if tokens_used + section_tokens <= self.token_budget:
-                    context_parts.append(section_text)
-                    tokens_used += section_tokens
+            # Partial inclusion (privileged sections are always worth truncating)
+            if allocated <= 0 or (not privileged and allocated <= 50):  # Minimum useful space
+                memory_logger.log_event("context_skip", {
+                    "label": label,
+                    "reason": "budget_exhausted" if allocated <= 0 else "budget_too_low"
+                })
                 continue
 
-            # Optional sections - fit within remaining budget
-            if tokens_used >= self.token_budget:
-                memory_logger.log_event("context_skip", {"label": label, "reason": "budget_exhausted"})
-                break
-
-            available = self.token_budget - tokens_used
-            if section_tokens <= available:
-                context_parts.append(section_text)
-                tokens_used += section_tokens
+            truncated = truncate_to_budget(section_text, allocated)
+            if truncated.strip():
+                context_parts.append(truncated + "\n\n")
+                added_tokens = count_tokens_approx(truncated, extra=2)
+                tokens_used += added_tokens
                 memory_logger.log_event("context_section", {
                     "label": label,
-                    "tokens": section_tokens,
-                    "status": "full"
+                    "tokens": added_tokens,
+                    "status": "truncated",
+                    "privileged": privileged
                 })
-            else:
-                # Partial inclusion
-                if available > 50:  # Minimum useful space
-                    truncated = truncate_to_budget(section_text, available)
-                    if truncated.strip():
-                        context_parts.append(truncated + "\n\n")
-                        added_tokens = count_tokens_approx(truncated + "\n\n")
-                        tokens_used += added_tokens
-                        memory_logger.log_event("context_section", {
-                            "label": label,
-                            "tokens": added_tokens,
-                            "status": "truncated"
-                        })
-                else:
-                    memory_logger.log_event("context_skip", {"label": label, "reason": "budget_too_low"})
-                break
 
         memory_logger.log_event("context_build_complete", {
             "total_tokens": tokens_used,
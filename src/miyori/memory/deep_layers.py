@@ -1,10 +1,21 @@
 from google import genai
 import json
-import numpy as np
 from typing import List, Dict, Any
 from miyori.interfaces.memory import IMemoryStore
 from miyori.utils.config import Config
-from miyori.utils.embeddings import EmbeddingService
+from miyori.utils.embeddings import EmbeddingService, embedding_to_blob
+from miyori.utils.executors import get_model_executor
+
+_FACT_PROMPT_HEAD = (
+    "Extract facts that Miyori has observed from these memories she has.\n\n"
+    "Your extracted fact will be used in her deeper memories, and it should be phrased in first person.\n"
+    "Do not say 'The user asked Miyori to tell a story', but say 'The user asked me to tell a story'.\n\n"
+    "Each cluster contains related conversations. Look for:\n"
+    "- Facts that appear multiple times within a cluster\n"
+    "- Recurring preferences, patterns, and decisions\n\n"
+)
+
+_FACT_PROMPT_TAIL = "Extract facts as simple sentences. Format: one fact per line.\n\nFacts:"
 
 class SemanticExtractor:
     def __init__(self, client: genai.Client, store: IMemoryStore):
@@ -18,33 +29,25 @@ class SemanticExtractor:
         if not clusters or not self.client:
             return
         
-        # Build prompt with cluster structure
-        prompt = "Extract facts that Miyori has observed from these memories she has.\n\n"
-        prompt += "Your extracted fact will be used in her deeper memories, and it should be phrased in first person.\n"
-        prompt += "Do not say 'The user asked Miyori to tell a story', but say 'The user asked me to tell a story'.\n\n"
-        prompt += "Each cluster contains related conversations. Look for:\n"
-        prompt += "- Facts that appear multiple times within a cluster\n"
-        prompt += "- Recurring preferences, patterns, and decisions\n\n"
-        
+        # Build prompt with cluster structure as a flat list of parts, joined once
+        parts: List[str] = [_FACT_PROMPT_HEAD]
         for cluster_idx, cluster in enumerate(clusters):
-            prompt += f"<CLUSTER_{cluster_idx}>\n"
-            for episode in cluster:
-                prompt += f"- {episode['summary']}\n"
-            prompt += f"</CLUSTER_{cluster_idx}>\n\n"
-        
-        prompt += "Extract facts as simple sentences. Format: one fact per line.\n\nFacts:"
+            parts.append(f"<CLUSTER_{cluster_idx}>\n")
+            parts.extend(f"- {episode['summary']}\n" for episode in cluster)
+            parts.append(f"</CLUSTER_{cluster_idx}>\n\n")
+        parts.append(_FACT_PROMPT_TAIL)
+        prompt = "".join(parts)
         
         try:
             import asyncio
             loop = asyncio.get_running_loop()
-            response = await loop.run_in_executor(None, lambda: self.client.models.generate_content(
+            response = await loop.run_in_executor(get_model_executor(), lambda: self.client.models.generate_content(
                 model=self.model_name,
                 contents=prompt
             ))
             
             # Parse facts from response
-            raw_facts = [line.strip("- ").strip() for line in response.text.split("\n") if line.strip()]
-            facts = [fact for fact in raw_facts if len(fact) > 5]
+            facts = [fact for line in (response.text or "").splitlines() if len(fact := line.strip("- ").strip()) > 5]
 
             if facts:
                 # Generate embeddings for all facts in batch
@@ -53,17 +56,17 @@ class SemanticExtractor:
                 # Store facts with source episode tracking
                 all_episode_ids = [ep['id'] for cluster in clusters for ep in cluster]
 
-                for fact, embedding in zip(facts, embeddings):
-                    # Convert embedding to bytes for database storage
-                    embedding_bytes = np.array(embedding, dtype=np.float32).tobytes()
-
-                    self.store.add_semantic_fact({
+                self.store.add_semantic_facts_bulk([
+                    {
                         "fact": fact,
                         "confidence": 0.7,
                         "status": "stable",
                         "derived_from": all_episode_ids,  # Track which episodes contributed
-                        "embedding": embedding_bytes
-                    })
+                        # Zero-copy float32 view for database storage
+                        "embedding": embedding_to_blob(embedding)
+                    }
+                    for fact, embedding in zip(facts, embeddings)
+                ])
 
             print(f"Extracted {len(facts)} facts from {len(clusters)} clusters ({len(all_episode_ids)} episodes)")
             
@@ -2,20 +2,29 @@ import asyncio
 import uuid
 import numpy as np
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from miyori.interfaces.memory import IMemoryStore
 from miyori.utils.embeddings import EmbeddingService
 from miyori.memory.scoring import ImportanceScorer
 from miyori.memory.budget import MemoryBudget
 from miyori.utils.memory_logger import memory_logger
 from miyori.utils.config import Config
+from miyori.utils.executors import get_model_executor
 
 class EmbeddingQueue:
+    # Max episodes embedded per API request
+    BATCH_SIZE = 32
+
     def __init__(self, store: IMemoryStore, embedding_service: EmbeddingService):
         self.store = store
         self.embedding_service = embedding_service
         self.queue = asyncio.Queue()
-        self.processing = False
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        """Start the long-lived embedding worker if it isn't already running."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._process_queue())
 
     async def add_episode(self, episode_data: Dict[str, Any]) -> str:
         """Store episode immediately, queue embedding generation."""
@@ -31,35 +40,66 @@ class EmbeddingQueue:
             "text_len": len(episode_data['summary'])
         })
         
-        # Start processor if not running
-        if not self.processing:
-            asyncio.create_task(self._process_queue())
+        self._ensure_worker()
         
         return episode_id
 
+    async def stop(self):
+        """Let the worker drain the queue, then shut it down."""
+        if self._worker is None or self._worker.done():
+            return
+        await self.queue.put(None)
+        await self._worker
+        self._worker = None
+
     async def _process_queue(self):
-        """Process embeddings in background."""
-        self.processing = True
-        while not self.queue.empty():
-            episode_id, text = await self.queue.get()
+        """Embed queued episodes in batches until a None sentinel is received."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first item, then drain whatever else is already waiting
+            batch = [await self.queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            stopping = None in batch
+            items = [item for item in batch if item is not None]
             try:
-                # Run sync embedding in executor to not block event loop
-                loop = asyncio.get_running_loop()
-                embedding = await loop.run_in_executor(None, self.embedding_service.embed, text)
-                
-                # Convert list to bytes for BLOB storage
-                embedding_blob = np.array(embedding, dtype=np.float32).tobytes()
-                
-                self.store.update_episode(episode_id, {
-                    'embedding': embedding_blob,
-                    'status': 'active'
-                })
-                memory_logger.log_event("embedding_success", {"id": episode_id})
-            except Exception as e:
-                import sys
-                sys.stderr.write(f"Embedding failed for {episode_id}: {e}\n")
+                if items:
+                    await self._embed_batch(loop, items)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if stopping:
+                return
+
+    async def _embed_batch(self, loop: asyncio.AbstractEventLoop, items: List[Tuple[str, str]]):
+        episode_ids = [episode_id for episode_id, _ in items]
+        texts = [text for _, text in items]
+        try:
+            # Run sync embedding in executor to not block event loop; one request for the whole batch
+            embeddings = await loop.run_in_executor(get_model_executor(), self.embedding_service.batchEmbedContents, texts)
+        except Exception as e:
+            import sys
+            sys.stderr.write(f"Embedding failed for {len(episode_ids)} episodes: {e}\n")
+            for episode_id in episode_ids:
+                memory_logger.log_event("embedding_failed", {"id": episode_id, "error": str(e)}, level="INFO")
+            return
+
+        try:
+            # One transaction for the whole batch instead of a commit per episode
+            self.store.activate_episodes(list(zip(episode_ids, embeddings)))
+        except Exception as e:
+            import sys
+            sys.stderr.write(f"Storing embeddings failed for {len(episode_ids)} episodes: {e}\n")
+            for episode_id in episode_ids:
                 memory_logger.log_event("embedding_failed", {"id": episode_id, "error": str(e)}, level="INFO")
-        self.processing = False
+            return
+
+        for episode_id in episode_ids:
+            memory_logger.log_event("embedding_success", {"id": episode_id})
 
 class EpisodicMemoryManager:
     def __init__(self, store: IMemoryStore, embedding_service: EmbeddingService):
@@ -67,10 +107,7 @@ class EpisodicMemoryManager:
         self.embedding_service = embedding_service
         self.queue = EmbeddingQueue(store, embedding_service)
         
-        project_root = Config.get_project_root()
-        config = Config.get('memory', {})
-        
-        self.budget = MemoryBudget(store, config)
+        self.budget = MemoryBudget(store, Config.data.get("memory", {}))
 
     async def add_episode(self, summary: str, full_text: Dict[str, str], importance: float = None):
         if importance is None:
@@ -94,36 +131,38 @@ class EpisodicMemoryManager:
         query_embedding = self.embedding_service.embed(query)
         candidates = self.store.search_episodes(query_embedding, limit=limit*4, status='active')
         
-        # 2. Rerank with formula: 
+        # 2. Rerank with formula (vectorized over all candidates): 
         # relevance = similarity * 0.5 + decayed_importance * 0.3 + recency * 0.2
-        reranked = []
-        for mem in candidates:
-            # Calculate recency (decay over ~30 days)
-            timestamp = datetime.fromisoformat(mem['timestamp'])
-            age_days = (datetime.now() - timestamp).days
-            recency_weight = 1.0 / (1 + age_days / 30)
-            
-            importance = mem.get('importance', 0.5)
-            similarity = mem.get('similarity', 0.0)
-            
-            # Use decayed importance for ranking
-            decayed_importance = ImportanceScorer.get_decayed_score(importance, mem['timestamp'])
-            
-            relevance = (similarity * 0.5) + (decayed_importance * 0.3) + (recency_weight * 0.2)
-            mem['relevance_score'] = relevance
-            reranked.append(mem)
-            
-            memory_logger.log_event("retrieval_ranking_item", {
-                "id": mem['id'],
-                "similarity": round(similarity, 3),
-                "decayed_importance": round(decayed_importance, 3),
-                "recency": round(recency_weight, 3),
-                "relevance": round(relevance, 3)
-            })
-            
-        # 3. Sort and return top N
-        reranked.sort(key=lambda x: x['relevance_score'], reverse=True)
-        results = reranked[:limit]
+        if not candidates:
+            results = []
+        else:
+            n = len(candidates)
+            age_days = ImportanceScorer.ages_in_days(mem['timestamp'] for mem in candidates)
+            importance = np.fromiter((mem.get('importance', 0.5) for mem in candidates), dtype=np.float64, count=n)
+            similarity = np.fromiter((mem.get('similarity', 0.0) for mem in candidates), dtype=np.float64, count=n)
+
+            # Recency decays over ~30 days; importance uses its own half-life
+            recency = 1.0 / (1 + age_days / 30)
+            decayed_importance = ImportanceScorer.get_decayed_scores(importance, age_days)
+            relevance = (similarity * 0.5) + (decayed_importance * 0.3) + (recency * 0.2)
+
+            for i, mem in enumerate(candidates):
+                mem['relevance_score'] = float(relevance[i])
+                memory_logger.log_event("retrieval_ranking_item", {
+                    "id": mem['id'],
+                    "similarity": round(float(similarity[i]), 3),
+                    "decayed_importance": round(float(decayed_importance[i]), 3),
+                    "recency": round(float(recency[i]), 3),
+                    "relevance": round(float(relevance[i]), 3)
+                })
+
+            # 3. Select top N without sorting the whole candidate list
+            if limit < n:
+                top = np.argpartition(-relevance, limit - 1)[:limit] if limit > 0 else np.array([], dtype=int)
+            else:
+                top = np.arange(n)
+            top = top[np.argsort(-relevance[top], kind='stable')]
+            results = [candidates[i] for i in top]
         
         memory_logger.log_event("retrieval", {
             "query": query[:100],
@@ -1,20 +1,31 @@
+import asyncio
+import hashlib
+import re
 from google import genai
-from typing import Optional
+from typing import Dict, Optional
 from miyori.utils.memory_logger import memory_logger
 from miyori.utils.config import Config
+from miyori.utils.executors import get_model_executor
+
+# Explicit "please remember" phrases, matched case-insensitively in a single pass
+_EXPLICIT_REMEMBER_RE = re.compile(
+    r"\b(?:remember this|don['\u2019]?t forget|take a note|keep this in mind)\b",
+    re.IGNORECASE
+)
 
 class MemoryGate:
     def __init__(self, client: genai.Client):
         self.client = client
         self.model_name = Config.data.get("memory", {}).get("gate_model")
+        # Gate evaluations currently running, keyed by a hash of the exchange
+        self._inflight: Dict[bytes, asyncio.Task] = {}
 
     async def should_remember(self, user_msg: str, miyori_msg: str) -> bool:
         """
         Decide if a conversation turn should be stored using LLM-aided gating.
         """
         # 1. Explicit request bypass (fast)
-        keywords = ["remember this", "don't forget", "take a note", "keep this in mind"]
-        if any(kw in user_msg.lower() for kw in keywords):
+        if _EXPLICIT_REMEMBER_RE.search(user_msg):
             print("Memory Gate: Explicit request detected.")
             return True
 
@@ -22,6 +33,17 @@ class MemoryGate:
         if not self.client:
             return True # Fallback to true if no client
 
+        # Identical exchanges evaluated concurrently share one LLM call
+        key = hashlib.sha1(f"{user_msg}||{miyori_msg}".encode("utf-8")).digest()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._evaluate(user_msg, miyori_msg))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _evaluate(self, user_msg: str, miyori_msg: str) -> bool:
+        """Ask the gate model whether the exchange is worth remembering."""
         prompt = f"""Evaluate if this conversation exchange should be approved for Miyori's memory.
 We should remember this if it contains:
 - Important facts about the user
@@ -37,9 +59,8 @@ Answer with 'YES' or 'NO' followed by ' --- <one sentence explaining reasoning>'
 
         try:            
             print("Memory Gate: Evaluating with LLM...")
-            import asyncio
             loop = asyncio.get_running_loop()
-            response = await loop.run_in_executor(None, lambda: self.client.models.generate_content(
+            response = await loop.run_in_executor(get_model_executor(), lambda: self.client.models.generate_content(
                 model=self.model_name,
                 contents=prompt
             ))
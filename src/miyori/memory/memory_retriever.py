@@ -1,9 +1,5 @@
 from typing import List, Dict, Any, Optional, Tuple
-import json
-import sqlite3
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
 from miyori.interfaces.memory import IMemoryStore
 from miyori.utils.memory_logger import memory_logger
 
@@ -37,95 +33,28 @@ class MemoryRetriever:
         """
         filters = filters or {}
 
-        # Build SQL query with filters
-        where_clauses = []
-        params = []
-
-        # Handle status filter
-        if 'status' in filters:
-            where_clauses.append("status = ?")
-            params.append(filters['status'])
-
-        # Handle confidence filter (semantic memory)
-        if 'confidence__gt' in filters and table == 'semantic_memory':
-            where_clauses.append("confidence > ?")
-            params.append(filters['confidence__gt'])
-
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-        # Execute search
-        with self.store._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            if table == 'episodic_memory':
-                cursor.execute(f"""
-                    SELECT * FROM episodic_memory
-                    WHERE {where_sql} AND embedding IS NOT NULL
-                """, params)
-            elif table == 'semantic_memory':
-                cursor.execute(f"""
-                    SELECT * FROM semantic_memory
-                    WHERE {where_sql} AND embedding IS NOT NULL
-                """, params)
-            else:
-                raise ValueError(f"Unknown table: {table}")
-
-            rows = cursor.fetchall()
-
-        if not rows:
-            return []
-
-        # Build embeddings matrix
-        embeddings_matrix = []
-        valid_rows = []
-
-        for row in rows:
-            embedding_blob = row['embedding']
-            if embedding_blob is not None:
-                mem_vec = np.frombuffer(embedding_blob, dtype=np.float32)
-                embeddings_matrix.append(mem_vec)
-                valid_rows.append(row)
-
-        if not embeddings_matrix:
-            return []
-
-        # Compute similarities
-        embeddings_matrix = np.array(embeddings_matrix)
-        query_vec = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
-        similarities = cosine_similarity(query_vec, embeddings_matrix)[0]
-
-        # Build results
-        results = []
-        for idx, row in enumerate(valid_rows):
-            data = dict(row)
-            data['similarity'] = float(similarities[idx])
-
-            # Parse JSON fields
-            if table == 'episodic_memory':
-                data['full_text'] = json.loads(data['full_text'])
-                data['topics'] = json.loads(data['topics'])
-                data['entities'] = json.loads(data['entities'])
-                data['connections'] = json.loads(data['connections'])
-            elif table == 'semantic_memory':
-                data['version_history'] = json.loads(data['version_history'])
-                data['derived_from'] = json.loads(data['derived_from'])
-                data['contradictions'] = json.loads(data['contradictions'])
-
-            results.append(data)
-
-        # Sort by similarity and return top results
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:limit]
-
-    def diversity_sample(self, results: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        if table not in ('episodic_memory', 'semantic_memory'):
+            raise ValueError(f"Unknown table: {table}")
+
+        # Confidence only applies to semantic memory
+        min_confidence = filters.get('confidence__gt') if table == 'semantic_memory' else None
+        return self.store.vector_search(
+            table,
+            query_embedding,
+            limit,
+            status=filters.get('status'),
+            min_confidence=min_confidence
+        )
+
+    def diversity_sample(self, results: List[Dict[str, Any]], limit: int, lambda_mult: float = 0.7) -> List[Dict[str, Any]]:
         """
-        Sample diverse results using clustering to avoid redundancy.
-        Groups by embedding similarity and takes top result from each cluster.
+        Sample diverse results with greedy Maximal Marginal Relevance to avoid redundancy.
+        Each pick maximizes lambda * similarity_to_query - (1 - lambda) * max_similarity_to_picked.
 
         Args:
-            results: Search results with embeddings
+            results: Search results from vector_search
             limit: Maximum results to return
+            lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
 
         Returns:
             Diverse subset of results
@@ -133,48 +62,44 @@ class MemoryRetriever:
         if len(results) <= limit:
             return results
 
-        if not results or 'embedding' not in results[0]:
-            # Fallback to simple truncation if no embeddings
-            return results[:limit]
+        # Only results carrying an embedding BLOB of the common size take part; keep their positions in `results`
+        blobs: List[bytes] = []
+        indices: List[int] = []
+        for i, result in enumerate(results):
+            blob = result.get('embedding')
+            if isinstance(blob, bytes) and (not blobs or len(blob) == len(blobs[0])):
+                blobs.append(blob)
+                indices.append(i)
 
-        # Extract embeddings for clustering
-        embeddings = []
-        for result in results:
-            if result.get('embedding') and isinstance(result['embedding'], bytes):
-                vec = np.frombuffer(result['embedding'], dtype=np.float32)
-                embeddings.append(vec)
-            else:
-                # Skip results without embeddings
-                continue
-
-        if len(embeddings) < limit:
+        if not blobs or len(indices) < limit:
             return results[:limit]
 
-        embeddings = np.array(embeddings)
-
-        # Determine number of clusters (capped at limit)
-        n_clusters = min(limit, len(embeddings))
-
-        # Cluster embeddings
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        cluster_labels = kmeans.fit_predict(embeddings)
-
-        # Select best result from each cluster
-        diverse_results = []
-        for cluster_id in range(n_clusters):
-            cluster_indices = [i for i, label in enumerate(cluster_labels) if label == cluster_id]
-            if cluster_indices:
-                # Take the result with highest similarity in this cluster
-                best_idx = max(cluster_indices, key=lambda i: results[i]['similarity'])
-                diverse_results.append(results[best_idx])
+        # Stored embeddings are already unit-norm float32; frombuffer reads them without decoding
+        embeddings = np.empty((len(blobs), len(blobs[0]) // 4), dtype=np.float32)
+        for row, blob in enumerate(blobs):
+            embeddings[row] = np.frombuffer(blob, dtype=np.float32)
+        relevance = np.array([results[i]['similarity'] for i in indices], dtype=np.float32)
+
+        # Greedy MMR, starting from the most relevant result
+        picked = [int(np.argmax(relevance))]
+        max_sim_to_picked = embeddings @ embeddings[picked[0]]
+        available = np.ones(len(indices), dtype=bool)
+        available[picked[0]] = False
+        while len(picked) < limit:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_sim_to_picked
+            scores[~available] = -np.inf
+            best = int(np.argmax(scores))
+            picked.append(best)
+            available[best] = False
+            np.maximum(max_sim_to_picked, embeddings @ embeddings[best], out=max_sim_to_picked)
 
         # Sort by similarity and return
-        diverse_results.sort(key=lambda x: x['similarity'], reverse=True)
+        diverse_results = sorted((results[indices[j]] for j in picked), key=lambda x: x['similarity'], reverse=True)
 
         memory_logger.log_event("diversity_sample", {
             "original_count": len(results),
             "sampled_count": len(diverse_results),
-            "clusters_used": n_clusters
+            "lambda": lambda_mult
         })
 
         return diverse_results
@@ -224,16 +224,15 @@ class MergeManager:
             all_derived_from.update(loser.get('derived_from', []))
             total_evidence_count += (loser.get('evidence_count', 0) or 0)
         
-        # Update winner
-        self.store.update_semantic_fact(winner['id'], {
-            'derived_from': list(all_derived_from),
-            'evidence_count': total_evidence_count,
-            'last_confirmed': datetime.now().isoformat()
-        })
-        
-        # Archive losers
+        # Update winner and archive losers as one unit
         loser_ids = [f['id'] for f in losers]
-        self.store.archive_merged_facts(loser_ids, winner['id'])
+        with self.store.transaction():
+            self.store.update_semantic_fact(winner['id'], {
+                'derived_from': list(all_derived_from),
+                'evidence_count': total_evidence_count,
+                'last_confirmed': datetime.now().isoformat()
+            })
+            self.store.archive_merged_facts(loser_ids, winner['id'])
         
         memory_logger.log_event("auto_merge_executed", {
             "winner_id": winner['id'],
@@ -317,16 +316,15 @@ Clusters to analyze:
                                 all_derived_from.update(loser.get('derived_from', []))
                                 total_evidence_count += (loser.get('evidence_count', 0) or 0)
                             
-                            # Update winner
-                            self.store.update_semantic_fact(winner['id'], {
-                                'derived_from': list(all_derived_from),
-                                'evidence_count': total_evidence_count,
-                                'last_confirmed': datetime.now().isoformat()
-                            })
-                            
-                            # Archive losers
+                            # Update winner and archive losers as one unit
                             loser_ids = [f['id'] for f in losers]
-                            self.store.archive_merged_facts(loser_ids, winner['id'])
+                            with self.store.transaction():
+                                self.store.update_semantic_fact(winner['id'], {
+                                    'derived_from': list(all_derived_from),
+                                    'evidence_count': total_evidence_count,
+                                    'last_confirmed': datetime.now().isoformat()
+                                })
+                                self.store.archive_merged_facts(loser_ids, winner['id'])
                             archived_total += len(loser_ids)
                             
                             memory_logger.log_event("llm_merge_executed", {
@@ -0,0 +1,27 @@
+import numpy as np
+from typing import Any, Tuple
+
+
+def quantize_int8(embedding: Any) -> Tuple[bytes, float]:
+    """
+    Symmetric int8 quantization of an embedding.
+    Returns (codes_blob, scale) where embedding ~= codes * scale.
+    """
+    if isinstance(embedding, (bytes, bytearray, memoryview)):
+        vec = np.frombuffer(embedding, dtype=np.float32)
+    else:
+        vec = np.asarray(embedding, dtype=np.float32)
+
+    max_abs = float(np.max(np.abs(vec))) if vec.size else 0.0
+    if max_abs == 0.0:
+        return np.zeros(vec.shape, dtype=np.int8).tobytes(), 0.0
+
+    scale = max_abs / 127.0
+    codes = np.round(vec / scale).astype(np.int8)
+    return codes.tobytes(), scale
+
+
+def dequantize_int8(codes_blob: bytes, scale: float) -> np.ndarray:
+    """Reconstruct an approximate float32 embedding from int8 codes."""
+    codes = np.frombuffer(codes_blob, dtype=np.int8)
+    return codes.astype(np.float32) * np.float32(scale or 0.0)
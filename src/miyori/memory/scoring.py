@@ -1,5 +1,12 @@
 import math
+import numpy as np
 from datetime import datetime
+from typing import Iterable, Optional, Union
+
+_LN2 = math.log(2)
+_US_PER_DAY = 86_400_000_000.0
+
+_PERSONAL_KEYWORDS = ("i am", "i want", "i like", "my name", "i feel", "i work")
 
 class ImportanceScorer:
     """Calculates importance scores and handles time-based decay."""
@@ -11,32 +18,33 @@ class ImportanceScorer:
         Returns 0-1 float.
         """
         score = 0.5  # baseline
+        text = user_msg.lower()
         
         # Simple heuristics
         # Explicit request
-        if "remember" in user_msg.lower():
+        if "remember" in text:
             score += 0.3
             
         # Personal keywords
-        personal_keywords = ["i am", "i want", "i like", "my name", "i feel", "i work"]
-        if any(kw in user_msg.lower() for kw in personal_keywords):
+        if any(kw in text for kw in _PERSONAL_KEYWORDS):
             score += 0.2
             
         # Decision/Goal
-        if "i will" in user_msg.lower() or "promise" in user_msg.lower():
+        if "i will" in text or "promise" in text:
             score += 0.25
             
         # Caps at 1.0
         return min(score, 1.0)
 
     @staticmethod
-    def get_decayed_score(base_score: float, timestamp_iso: str) -> float:
+    def get_decayed_score(base_score: float, timestamp_iso: Union[str, datetime], now: Optional[datetime] = None) -> float:
         """
         Calculate decayed importance score based on age.
+        Accepts an ISO string or an already-parsed datetime; pass `now` to reuse one clock read across a batch.
         """
         try:
-            timestamp = datetime.fromisoformat(timestamp_iso)
-            age_days = (datetime.now() - timestamp).days
+            timestamp = timestamp_iso if isinstance(timestamp_iso, datetime) else datetime.fromisoformat(timestamp_iso)
+            age_days = ((now or datetime.now()) - timestamp).days
             if age_days <= 0:
                 return base_score
                 
@@ -44,7 +52,34 @@ class ImportanceScorer:
             half_life = 100 * base_score 
             if half_life <= 0: return 0.0
             
-            decay = math.exp(-age_days * math.log(2) / half_life)
+            decay = math.exp(-age_days * _LN2 / half_life)
             return base_score * decay
         except Exception:
             return base_score
+
+    @staticmethod
+    def ages_in_days(timestamps_iso: Iterable[str], now: Optional[datetime] = None) -> np.ndarray:
+        """
+        Whole-day ages of ISO timestamps, as get_decayed_score computes them.
+        All strings are parsed in one numpy call against a single clock read.
+        """
+        timestamps = np.array(list(timestamps_iso), dtype='datetime64[us]')
+        now_us = np.datetime64(now or datetime.now(), 'us').astype(np.int64)
+        age_us = now_us - timestamps.astype(np.int64)
+        ages = np.floor(age_us / _US_PER_DAY)
+        # Unparseable/missing timestamps stay NaN, as the timedelta division gave them
+        return np.where(np.isnat(timestamps), np.nan, ages)
+
+    @staticmethod
+    def get_decayed_scores(base_scores: np.ndarray, age_days: np.ndarray) -> np.ndarray:
+        """
+        Vectorized get_decayed_score over arrays of base scores and whole-day ages.
+        """
+        base_scores = np.asarray(base_scores, dtype=np.float64)
+        age_days = np.asarray(age_days, dtype=np.float64)
+        half_life = 100 * base_scores
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            decayed = base_scores * np.exp(-age_days * _LN2 / half_life)
+        decayed = np.where(half_life <= 0, 0.0, decayed)
+        return np.where(age_days <= 0, base_scores, decayed)
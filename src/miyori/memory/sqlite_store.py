@@ -1,19 +1,191 @@
+import math
 import sqlite3
 import json
+import threading
 import uuid
+import weakref
 import numpy as np
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from miyori.utils.config import Config
 from miyori.interfaces.memory import IMemoryStore
+from miyori.memory.quantization import quantize_int8
+from miyori.memory.vector_index import VectorIndex
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Most JSON columns hold an empty list/object; skip the parser for those
+_EMPTY_JSON = {"[]": list, "{}": dict, "null": lambda: None}
+
+def _json_loads(text: str) -> Any:
+    empty = _EMPTY_JSON.get(text)
+    if empty is not None:
+        return empty()
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+def _json_dumps(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value)
+
+def _unit_embedding_blob(embedding: Any) -> Optional[memoryview]:
+    """
+    L2-normalize an embedding (bytes, list or array) and return it as a float32 BLOB.
+    Stored vectors are unit-norm so cosine similarity is a plain dot product.
+    """
+    if embedding is None:
+        return None
+    if isinstance(embedding, (bytes, bytearray, memoryview)):
+        vec = np.frombuffer(embedding, dtype=np.float32)
+    else:
+        vec = np.asarray(embedding, dtype=np.float32)
+    norm2 = float(np.vdot(vec, vec))
+    if norm2 > 0 and abs(norm2 - 1.0) > 1e-6:
+        vec = vec / np.float32(math.sqrt(norm2))
+    return np.ascontiguousarray(vec).data.cast('B')
+
+class _ReadConnectionSlot:
+    """One thread's read connection, stored in a threading.local so it is dropped when the thread exits."""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+def _release_read_connection(conn: sqlite3.Connection, open_conns: List[sqlite3.Connection], lock) -> None:
+    """Close a read connection whose thread has exited (or whose store is closing)."""
+    with lock:
+        if conn in open_conns:
+            open_conns.remove(conn)
+    conn.close()
+
+@lru_cache(maxsize=64)
+def _update_sql(table: str, columns: Tuple[str, ...]) -> str:
+    """UPDATE-by-id statement for one set of columns; callers only use a handful of shapes."""
+    return f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
 
 class SQLiteMemoryStore(IMemoryStore):
     def __init__(self):
         self.db_path = Config.get_project_root() / "memory.db"
+        self._conn_lock = threading.RLock()
+        self._conn = self._connect()
+        # Nesting depth of transaction() blocks; writes inside one commit when it ends
+        self._tx_depth = 0
+        # Per-thread read-only connections; WAL lets them read alongside the writer
+        self._local = threading.local()
+        self._read_conns: List[sqlite3.Connection] = []
         self._init_db()
+        self._vector_indexes = {
+            table: VectorIndex(self, table)
+            for table in ('episodic_memory', 'semantic_memory')
+        }
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the long-lived connection shared by every store call."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # WAL lets the consolidation process read while the app writes (and vice versa)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        # Wait on a write lock held by the consolidation process instead of failing fast
+        conn.execute("PRAGMA busy_timeout=60000")
+        return conn
+
+    @contextmanager
     def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """
+        Borrow the shared connection. Access is serialized across threads;
+        the block's writes are committed on exit, or rolled back on error.
+        """
+        with self._conn_lock:
+            if self._tx_depth:
+                # Inside transaction(): the outermost block commits or rolls back
+                yield self._conn
+                return
+            with self._conn:
+                yield self._conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group several store writes into one BEGIN IMMEDIATE ... COMMIT.
+        Everything written through the store inside the block commits together,
+        or is rolled back together on error. Other threads' writes wait for the
+        block to end, so keep it short and don't await inside it.
+        """
+        with self._conn_lock:
+            if self._tx_depth:
+                self._tx_depth += 1
+                try:
+                    yield
+                finally:
+                    self._tx_depth -= 1
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._tx_depth = 1
+            try:
+                yield
+            except BaseException:
+                self._conn.rollback()
+                raise
+            else:
+                self._conn.commit()
+            finally:
+                self._tx_depth = 0
+
+    @contextmanager
+    def _get_read_connection(self):
+        """
+        Borrow this thread's read-only connection. Reads take no store lock,
+        so searches from worker threads don't queue behind each other or a write.
+        The connection is closed once the thread exits.
+        """
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            conn = sqlite3.connect(
+                f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA busy_timeout=60000")
+            slot = _ReadConnectionSlot(conn)
+            # Runs when the thread's locals are discarded; it must not reference self,
+            # or the finalizer would keep the store alive
+            weakref.finalize(slot, _release_read_connection, conn, self._read_conns, self._conn_lock)
+            self._local.slot = slot
+            with self._conn_lock:
+                self._read_conns.append(conn)
+        yield slot.conn
+
+    def close(self):
+        """
+        Snapshot the vector indexes, then close the shared write connection
+        and every per-thread read connection.
+        """
+        for index in self._vector_indexes.values():
+            index.save_snapshot()
+        with self._conn_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
+            self._conn.close()
+
+    def get_vector_index(self, table: str) -> VectorIndex:
+        """Return the in-process vector index for 'episodic_memory' or 'semantic_memory'."""
+        if table not in self._vector_indexes:
+            raise ValueError(f"Unknown table: {table}")
+        return self._vector_indexes[table]
 
     def _init_db(self):
         """Initialize the database schema."""
@@ -33,7 +205,9 @@ class SQLiteMemoryStore(IMemoryStore):
                     entities TEXT,  -- JSON string
                     connections TEXT, -- JSON string
                     status TEXT,
-                    consolidated_at DATETIME
+                    consolidated_at DATETIME,
+                    embedding_i8 BLOB,      -- int8 codes of embedding
+                    embedding_scale REAL    -- dequantization scale
                 )
             """)
 
@@ -65,11 +239,107 @@ class SQLiteMemoryStore(IMemoryStore):
             cursor.execute("SELECT COUNT(*) FROM schema_version")
             if cursor.fetchone()[0] == 0:
                 cursor.execute("INSERT INTO schema_version (version) VALUES (1)")
+
+            # Random identity of this database file, so files derived from it (vector
+            # snapshots) are never applied to a deleted-and-recreated database
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+            cursor.execute(
+                "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('db_id', ?)",
+                (str(uuid.uuid4()),)
+            )
+            self.db_id: str = cursor.execute("SELECT value FROM store_meta WHERE key = 'db_id'").fetchone()[0]
             
             # Add new columns if they don't exist (for existing databases)
+            self._migrate_episodic_memory_columns(cursor)
             self._migrate_semantic_memory_columns(cursor)
+
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            if cursor.fetchone()[0] < 2:
+                self._migrate_normalize_embeddings(cursor)
+                cursor.execute("INSERT INTO schema_version (version) VALUES (2)")
+
+            self._init_vector_changelog(cursor)
+
+            # Serves list_recent_active: status equality + timestamp range/order
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_episodic_status_timestamp
+                ON episodic_memory(status, timestamp)
+            """)
+            # Serves get_semantic_facts / get_all_active_facts: status filter + confidence threshold
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_semantic_status_confidence
+                ON semantic_memory(status, confidence)
+            """)
+            # Indexes that only consolidation reads are created by ensure_indexes()
             
-            conn.commit()
+
+    def ensure_indexes(self):
+        """
+        Create the indexes used only by consolidation. Deferred from _init_db so
+        a fresh store's per-turn episode inserts don't maintain them until
+        consolidation first needs them.
+        """
+        with self._get_connection() as conn:
+            # Serves get_unconsolidated_episodes: partial, so it only holds the (small) backlog
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_episodic_unconsolidated
+                ON episodic_memory(status) WHERE consolidated_at IS NULL
+            """)
+
+    def _init_vector_changelog(self, cursor):
+        """
+        Record every write that can affect vector search so in-process
+        indexes (see VectorIndex) can refresh incrementally.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vector_changelog (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id TEXT NOT NULL
+            )
+        """)
+
+        tracked_columns = {
+            'episodic_memory': "embedding, status",
+            'semantic_memory': "embedding, status, confidence",
+        }
+        for table, columns in tracked_columns.items():
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_vector_insert
+                AFTER INSERT ON {table}
+                BEGIN
+                    INSERT INTO vector_changelog (table_name, row_id) VALUES ('{table}', NEW.id);
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_vector_update
+                AFTER UPDATE OF {columns} ON {table}
+                BEGIN
+                    INSERT INTO vector_changelog (table_name, row_id) VALUES ('{table}', NEW.id);
+                END
+            """)
+
+        # Keep the log bounded; indexes that fall behind the pruned range reload fully
+        cursor.execute("""
+            DELETE FROM vector_changelog
+            WHERE seq <= (SELECT MAX(seq) FROM vector_changelog) - 10000
+        """)
+
+    def _migrate_episodic_memory_columns(self, cursor):
+        """Add new columns to episodic_memory if they don't exist."""
+        cursor.execute("PRAGMA table_info(episodic_memory)")
+        existing_columns = {row[1] for row in cursor.fetchall()}
+
+        if 'embedding_i8' not in existing_columns:
+            cursor.execute("ALTER TABLE episodic_memory ADD COLUMN embedding_i8 BLOB")
+
+        if 'embedding_scale' not in existing_columns:
+            cursor.execute("ALTER TABLE episodic_memory ADD COLUMN embedding_scale REAL")
 
     def _migrate_semantic_memory_columns(self, cursor):
         """Add new columns to semantic_memory if they don't exist."""
@@ -83,9 +353,32 @@ class SQLiteMemoryStore(IMemoryStore):
         if 'merged_into_id' not in existing_columns:
             cursor.execute("ALTER TABLE semantic_memory ADD COLUMN merged_into_id TEXT DEFAULT NULL")
 
+    def _migrate_normalize_embeddings(self, cursor):
+        """Schema v2: rewrite stored embeddings (and their int8 copies) as unit vectors."""
+        cursor.execute("SELECT id, embedding FROM episodic_memory WHERE embedding IS NOT NULL")
+        updates = []
+        for row_id, blob in cursor.fetchall():
+            unit = _unit_embedding_blob(blob)
+            updates.append((unit, *quantize_int8(unit), row_id))
+        cursor.executemany(
+            "UPDATE episodic_memory SET embedding = ?, embedding_i8 = ?, embedding_scale = ? WHERE id = ?",
+            updates
+        )
+
+        cursor.execute("SELECT id, embedding FROM semantic_memory WHERE embedding IS NOT NULL")
+        cursor.executemany(
+            "UPDATE semantic_memory SET embedding = ? WHERE id = ?",
+            [(_unit_embedding_blob(blob), row_id) for row_id, blob in cursor.fetchall()]
+        )
+
     def add_episode(self, episode_data: Dict[str, Any]) -> str:
         episode_id = episode_data.get('id') or str(uuid.uuid4())
         timestamp = episode_data.get('timestamp') or datetime.now().isoformat()
+
+        embedding = _unit_embedding_blob(episode_data.get('embedding'))
+        embedding_i8, embedding_scale = None, None
+        if embedding is not None:
+            embedding_i8, embedding_scale = quantize_int8(embedding)
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -93,22 +386,24 @@ class SQLiteMemoryStore(IMemoryStore):
                 INSERT INTO episodic_memory (
                     id, summary, full_text, timestamp, embedding,
                     importance, topics, entities,
-                    connections, status, consolidated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    connections, status, consolidated_at,
+                    embedding_i8, embedding_scale
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 episode_id,
                 episode_data.get('summary'),
-                json.dumps(episode_data.get('full_text', {})),
+                _json_dumps(episode_data.get('full_text', {})),
                 timestamp,
-                episode_data.get('embedding'), # Should be bytes/BLOB
+                embedding,
                 episode_data.get('importance', 0.5),
-                json.dumps(episode_data.get('topics', [])),
-                json.dumps(episode_data.get('entities', [])),
-                json.dumps(episode_data.get('connections', [])),
+                _json_dumps(episode_data.get('topics', [])),
+                _json_dumps(episode_data.get('entities', [])),
+                _json_dumps(episode_data.get('connections', [])),
                 episode_data.get('status', 'pending_embedding'),
-                episode_data.get('consolidated_at')  # NULL for new episodes
+                episode_data.get('consolidated_at'),  # NULL for new episodes
+                embedding_i8,
+                embedding_scale
             ))
-            conn.commit()
         
         from miyori.utils.memory_logger import memory_logger
         memory_logger.log_event("db_add_episode", {
@@ -119,41 +414,33 @@ class SQLiteMemoryStore(IMemoryStore):
         return episode_id
 
     def get_episode(self, episode_id: str) -> Optional[Dict[str, Any]]:
-        with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM episodic_memory WHERE id = ?", (episode_id,))
             row = cursor.fetchone()
             if row:
-                data = dict(row)
-                data['full_text'] = json.loads(data['full_text'])
-                data['topics'] = json.loads(data['topics'])
-                data['entities'] = json.loads(data['entities'])
-                data['connections'] = json.loads(data['connections'])
+                data = self._decode_row(row, 'episodic_memory')
                 return data
         return None
 
     def update_episode(self, episode_id: str, updates: Dict[str, Any]) -> bool:
         if not updates:
             return False
+
+        if updates.get('embedding') is not None:
+            # Store unit-norm and keep the int8 copy in sync with the float32 embedding
+            updates = dict(updates)
+            updates['embedding'] = _unit_embedding_blob(updates['embedding'])
+            updates['embedding_i8'], updates['embedding_scale'] = quantize_int8(updates['embedding'])
             
-        set_parts = []
-        values = []
-        for key, value in updates.items():
-            if key in ['full_text', 'topics', 'entities', 'connections']:
-                set_parts.append(f"{key} = ?")
-                values.append(json.dumps(value))
-            else:
-                set_parts.append(f"{key} = ?")
-                values.append(value)
-        
+        json_fields = self._JSON_FIELDS['episodic_memory']
+        values = [_json_dumps(value) if key in json_fields else value for key, value in updates.items()]
         values.append(episode_id)
-        query = f"UPDATE episodic_memory SET {', '.join(set_parts)} WHERE id = ?"
+        query = _update_sql('episodic_memory', tuple(updates))
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, tuple(values))
-            conn.commit()
             
             from miyori.utils.memory_logger import memory_logger
             memory_logger.log_event("db_update_episode", {
@@ -163,72 +450,97 @@ class SQLiteMemoryStore(IMemoryStore):
             })
             return cursor.rowcount > 0
 
-    def search_episodes(self, query_embedding: List[float], limit: int = 5, status: str = 'active') -> List[Dict[str, Any]]:
+    # JSON-encoded columns per table, decoded on read
+    _JSON_FIELDS = {
+        'episodic_memory': ('full_text', 'topics', 'entities', 'connections'),
+        'semantic_memory': ('version_history', 'derived_from', 'contradictions'),
+    }
+
+    def _decode_row(self, row: sqlite3.Row, table: str) -> Dict[str, Any]:
+        """Turn a fetched row into a dict with its JSON columns decoded."""
+        data = dict(row)
+        for field in self._JSON_FIELDS[table]:
+            data[field] = _json_loads(data[field])
+        return data
+
+    def hydrate_hits(self, table: str, hits: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
         """
-        Vector search using cosine similarity.
-        Note: Still does full table scan - see scalability notes below.
+        Load full rows for (id, similarity) hits from a VectorIndex search,
+        keeping hit order and attaching 'similarity'.
         """
-        from sklearn.metrics.pairwise import cosine_similarity
-        import numpy as np
-        
-        with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
+        rows_by_id = {}
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM episodic_memory WHERE status = ?", (status,))
-            rows = cursor.fetchall()
-        
-        if not rows:
-            return []
-        
-        # Build matrix of all embeddings at once
-        embeddings_matrix = []
-        valid_rows = []
-        
-        for row in rows:
-            if row['embedding'] is not None:
-                mem_vec = np.frombuffer(row['embedding'], dtype=np.float32)
-                embeddings_matrix.append(mem_vec)
-                valid_rows.append(row)
-        
-        if not embeddings_matrix:
-            return []
-        
-        # Convert to numpy array and compute all similarities at once
-        embeddings_matrix = np.array(embeddings_matrix)
-        query_vec = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
-        
-        # Compute cosine similarity for all vectors at once
-        similarities = cosine_similarity(query_vec, embeddings_matrix)[0]
-        
-        # Build results with similarity scores
+            for i in range(0, len(hits), 500):
+                chunk = [row_id for row_id, _ in hits[i:i + 500]]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders})", chunk)
+                rows_by_id.update((row['id'], row) for row in cursor.fetchall())
+
         results = []
-        for idx, row in enumerate(valid_rows):
-            data = dict(row)
-            data['similarity'] = float(similarities[idx])
-            data['full_text'] = json.loads(data['full_text'])
-            data['topics'] = json.loads(data['topics'])
-            data['entities'] = json.loads(data['entities'])
-            data['connections'] = json.loads(data['connections'])
+        for row_id, similarity in hits:
+            row = rows_by_id.get(row_id)
+            if row is None:
+                continue
+            data = self._decode_row(row, table)
+            data['similarity'] = similarity
             results.append(data)
-        
-        # Sort and return top N
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        final_results = results[:limit]
+        return results
+
+    def vector_search(
+        self,
+        table: str,
+        query_embedding: List[float],
+        limit: int,
+        status: Optional[str] = None,
+        min_confidence: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Vector search using cosine similarity.
+        Ranks against the table's in-process VectorIndex, then loads only the top rows.
+        min_confidence (strictly greater than) only applies to semantic_memory.
+        """
+        hits = self.get_vector_index(table).search(
+            query_embedding, limit, status=status, min_confidence=min_confidence
+        )
+        if not hits:
+            return []
+        return self.hydrate_hits(table, hits)
+
+    def search_episodes(self, query_embedding: List[float], limit: int = 5, status: str = 'active') -> List[Dict[str, Any]]:
+        """Vector search over episodes with the given status."""
+        final_results = self.vector_search('episodic_memory', query_embedding, limit, status=status)
         
         from miyori.utils.memory_logger import memory_logger
         memory_logger.log_event("db_search_episodes", {
             "status": status,
-            "total_candidates": len(results),
             "returned_count": len(final_results),
             "top_similarity": final_results[0]['similarity'] if final_results else 0
         })
         
         return final_results
 
+    def list_recent_active(self, since: str, min_importance: float = 0.0, limit: int = 20) -> List[Dict[str, Any]]:
+        """Active episodes newer than `since` with importance >= min_importance, newest first."""
+        with self._get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM episodic_memory
+                WHERE status = 'active' AND timestamp >= ? AND importance >= ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (since, min_importance, limit))
+            rows = cursor.fetchall()
+
+        results = []
+        for row in rows:
+            data = self._decode_row(row, 'episodic_memory')
+            results.append(data)
+        return results
+
     def get_unconsolidated_episodes(self, status: str = 'active', limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get episodes that haven't been consolidated yet (consolidated_at IS NULL)."""
-        with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
 
             query = "SELECT * FROM episodic_memory WHERE status = ? AND consolidated_at IS NULL"
@@ -243,11 +555,7 @@ class SQLiteMemoryStore(IMemoryStore):
 
         results = []
         for row in rows:
-            data = dict(row)
-            data['full_text'] = json.loads(data['full_text'])
-            data['topics'] = json.loads(data['topics'])
-            data['entities'] = json.loads(data['entities'])
-            data['connections'] = json.loads(data['connections'])
+            data = self._decode_row(row, 'episodic_memory')
             results.append(data)
 
         from miyori.utils.memory_logger import memory_logger
@@ -258,6 +566,56 @@ class SQLiteMemoryStore(IMemoryStore):
         })
         return results
 
+    def activate_episodes(self, embeddings: List[Tuple[str, Any]]) -> int:
+        """
+        Store embeddings for pending episodes and mark them active, all in one transaction.
+        Returns the number of episodes updated.
+        """
+        rows = []
+        for episode_id, embedding in embeddings:
+            blob = _unit_embedding_blob(embedding)
+            rows.append((blob, *quantize_int8(blob), episode_id))
+        if not rows:
+            return 0
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE episodic_memory
+                SET embedding = ?, embedding_i8 = ?, embedding_scale = ?, status = 'active'
+                WHERE id = ?
+            """, rows)
+            updated = cursor.rowcount
+
+        from miyori.utils.memory_logger import memory_logger
+        memory_logger.log_event("db_activate_episodes", {"count": len(rows), "updated": updated})
+        return updated
+
+    def set_episodes_status(self, episode_ids: List[str], status: str) -> int:
+        """Set the status of many episodes in one transaction; returns the number updated."""
+        if not episode_ids:
+            return 0
+
+        updated = 0
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(episode_ids), 500):
+                chunk = episode_ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(
+                    f"UPDATE episodic_memory SET status = ? WHERE id IN ({placeholders})",
+                    [status] + chunk
+                )
+                updated += cursor.rowcount
+
+        from miyori.utils.memory_logger import memory_logger
+        memory_logger.log_event("db_set_episodes_status", {
+            "status": status,
+            "count": len(episode_ids),
+            "updated": updated
+        })
+        return updated
+
     def mark_episodes_consolidated(self, episode_ids: List[str]) -> bool:
         """Mark episodes as consolidated by setting consolidated_at timestamp."""
         if not episode_ids:
@@ -273,7 +631,6 @@ class SQLiteMemoryStore(IMemoryStore):
                 SET consolidated_at = ?
                 WHERE id IN ({placeholders})
             """, [now] + episode_ids)
-            conn.commit()
 
             from miyori.utils.memory_logger import memory_logger
             memory_logger.log_event("db_mark_episodes_consolidated", {
@@ -282,48 +639,63 @@ class SQLiteMemoryStore(IMemoryStore):
             })
             return cursor.rowcount > 0
 
+    _SEMANTIC_FACT_INSERT = """
+        INSERT OR REPLACE INTO semantic_memory (
+            id, fact, confidence, first_observed, last_confirmed,
+            version_history, derived_from, contradictions, status, embedding,
+            evidence_count, merged_into_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _semantic_fact_row(self, fact_data: Dict[str, Any], now: str) -> tuple:
+        return (
+            fact_data.get('id') or str(uuid.uuid4()),
+            fact_data.get('fact'),
+            fact_data.get('confidence', 1.0),
+            fact_data.get('first_observed') or now,
+            fact_data.get('last_confirmed') or now,
+            _json_dumps(fact_data.get('version_history', [])),
+            _json_dumps(fact_data.get('derived_from', [])),
+            _json_dumps(fact_data.get('contradictions', [])),
+            fact_data.get('status', 'stable'),
+            _unit_embedding_blob(fact_data.get('embedding')),
+            fact_data.get('evidence_count', 0),
+            fact_data.get('merged_into_id')
+        )
+
     def add_semantic_fact(self, fact_data: Dict[str, Any]) -> str:
-        fact_id = fact_data.get('id') or str(uuid.uuid4())
+        row = self._semantic_fact_row(fact_data, datetime.now().isoformat())
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self._SEMANTIC_FACT_INSERT, row)
+        return row[0]
+
+    def add_semantic_facts_bulk(self, facts: List[Dict[str, Any]]) -> List[str]:
+        """Insert many semantic facts in a single transaction."""
+        if not facts:
+            return []
+
         now = datetime.now().isoformat()
+        rows = [self._semantic_fact_row(fact_data, now) for fact_data in facts]
 
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO semantic_memory (
-                    id, fact, confidence, first_observed, last_confirmed,
-                    version_history, derived_from, contradictions, status, embedding,
-                    evidence_count, merged_into_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                fact_id,
-                fact_data.get('fact'),
-                fact_data.get('confidence', 1.0),
-                fact_data.get('first_observed') or now,
-                fact_data.get('last_confirmed') or now,
-                json.dumps(fact_data.get('version_history', [])),
-                json.dumps(fact_data.get('derived_from', [])),
-                json.dumps(fact_data.get('contradictions', [])),
-                fact_data.get('status', 'stable'),
-                fact_data.get('embedding'),  # Already in bytes format
-                fact_data.get('evidence_count', 0),
-                fact_data.get('merged_into_id')
-            ))
-            conn.commit()
-        return fact_id
+            cursor.executemany(self._SEMANTIC_FACT_INSERT, rows)
+
+        from miyori.utils.memory_logger import memory_logger
+        memory_logger.log_event("db_add_semantic_facts_bulk", {"count": len(rows)})
+        return [row[0] for row in rows]
 
     def get_semantic_facts(self, status: str = 'stable', limit: int = 10) -> List[Dict[str, Any]]:
-        with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM semantic_memory WHERE status = ? LIMIT ?", (status, limit))
             rows = cursor.fetchall()
 
         results = []
         for row in rows:
-            data = dict(row)
-            data['version_history'] = json.loads(data['version_history'])
-            data['derived_from'] = json.loads(data['derived_from'])
-            data['contradictions'] = json.loads(data['contradictions'])
+            data = self._decode_row(row, 'semantic_memory')
             # Convert embedding bytes back to list of floats
             if data['embedding'] is not None:
                 data['embedding'] = np.frombuffer(data['embedding'], dtype=np.float32).tolist()
@@ -335,26 +707,20 @@ class SQLiteMemoryStore(IMemoryStore):
         if not updates:
             return False
         
-        set_parts = []
+        json_fields = self._JSON_FIELDS['semantic_memory']
         values = []
         for key, value in updates.items():
-            if key in ['version_history', 'derived_from', 'contradictions']:
-                set_parts.append(f"{key} = ?")
-                values.append(json.dumps(value))
-            elif key == 'embedding' and isinstance(value, (list, np.ndarray)):
-                set_parts.append(f"{key} = ?")
-                values.append(np.array(value, dtype=np.float32).tobytes())
-            else:
-                set_parts.append(f"{key} = ?")
-                values.append(value)
-        
+            if key in json_fields:
+                value = _json_dumps(value)
+            elif key == 'embedding':
+                value = _unit_embedding_blob(value)
+            values.append(value)
         values.append(fact_id)
-        query = f"UPDATE semantic_memory SET {', '.join(set_parts)} WHERE id = ?"
+        query = _update_sql('semantic_memory', tuple(updates))
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, tuple(values))
-            conn.commit()
             
             from miyori.utils.memory_logger import memory_logger
             memory_logger.log_event("db_update_semantic_fact", {
@@ -366,8 +732,7 @@ class SQLiteMemoryStore(IMemoryStore):
 
     def get_all_active_facts(self, min_confidence: Optional[float] = None) -> List[Dict[str, Any]]:
         """Get all active/stable facts for batch operations."""
-        with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
             if min_confidence is not None:
@@ -383,10 +748,7 @@ class SQLiteMemoryStore(IMemoryStore):
         
         results = []
         for row in rows:
-            data = dict(row)
-            data['version_history'] = json.loads(data['version_history'])
-            data['derived_from'] = json.loads(data['derived_from'])
-            data['contradictions'] = json.loads(data['contradictions'])
+            data = self._decode_row(row, 'semantic_memory')
             # Keep embedding as bytes for vector operations
             results.append(data)
         
@@ -413,7 +775,6 @@ class SQLiteMemoryStore(IMemoryStore):
                     last_confirmed = ?
                 WHERE id IN ({placeholders})
             """, [winner_id, now] + loser_ids)
-            conn.commit()
             
             from miyori.utils.memory_logger import memory_logger
             memory_logger.log_event("db_archive_merged_facts", {
@@ -1,19 +1,40 @@
+from typing import Optional
 from google import genai
 from miyori.utils.config import Config
+from miyori.utils.executors import get_model_executor
+
+_PROMPT_TEMPLATE = """Write a 1–2 sentence summary of the recent exchange to be stored in Miyori’s long-term memory.
+Write the summary in the *first person*, drafting it as if Miyori is recording their own memory.
+Use "I", "me", "my" to refer to Miyori.
+The user is using voice recognition and their input may contain errors; rely on Miyori's responses to clarify any transcription errors in the user's input.
+Focus primarily on the most recent messages, using earlier turns only for supporting context.
+Preserve: key facts, emotions, decisions. {context_section} 
+
+Current exchange:
+User: {user_msg}
+Miyori: {miyori_msg}
+
+Summary:"""
+
+_client: Optional[genai.Client] = None
+
+def _get_client() -> Optional[genai.Client]:
+    """Build the fallback Gemini client once and share it across Summarizer instances."""
+    global _client
+    if _client is None:
+        api_key = Config.data.get("llm", {}).get("api_key")
+        if api_key:
+            _client = genai.Client(api_key=api_key)
+    return _client
 
 class Summarizer:
     def __init__(self, client: genai.Client = None):
-        self.client = client
-        llm_config = Config.data.get("llm", {})
+        self.client = client or _get_client()
         if not self.client:
-            api_key = llm_config.get("api_key")
-            if api_key:
-                self.client = genai.Client(api_key=api_key)
-            else:
-                print("Warning: API Key not found for Summarizer")
+            print("Warning: API Key not found for Summarizer")
         
         # Use a cheap/fast model for summarization
-        self.model_name = llm_config.get("summarizer_model")
+        self.model_name = Config.data.get("llm", {}).get("summarizer_model")
 
     async def create_summary(self, user_msg: str, miyori_msg: str, recent_context: list[str] = None) -> str:
         """Create a semantic summary of the exchange using the LLM, with optional recent conversation context."""
@@ -26,24 +47,17 @@ class Summarizer:
         if recent_context and len(recent_context) > 0:
             context_section = "\n\nRecent conversation context:\n" + "\n\n".join(recent_context) + "\n\n"
 
-        prompt = f"""Write a 1–2 sentence summary of the recent exchange to be stored in Miyori’s long-term memory.
-Write the summary in the *first person*, drafting it as if Miyori is recording their own memory.
-Use "I", "me", "my" to refer to Miyori.
-The user is using voice recognition and their input may contain errors; rely on Miyori's responses to clarify any transcription errors in the user's input.
-Focus primarily on the most recent messages, using earlier turns only for supporting context.
-Preserve: key facts, emotions, decisions. {context_section} 
-
-Current exchange:
-User: {user_msg}
-Miyori: {miyori_msg}
-
-Summary:"""
+        prompt = _PROMPT_TEMPLATE.format(
+            context_section=context_section,
+            user_msg=user_msg,
+            miyori_msg=miyori_msg
+        )
 
         try:
             # Running the sync client call in a thread to keep it async-friendly
             import asyncio
             loop = asyncio.get_running_loop()
-            response = await loop.run_in_executor(None, lambda: self.client.models.generate_content(
+            response = await loop.run_in_executor(get_model_executor(), lambda: self.client.models.generate_content(
                 model=self.model_name,
                 contents=prompt
             ))
@@ -0,0 +1,366 @@
+import math
+import os
+import sys
+import tempfile
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Set, Tuple
+from miyori.utils.config import Config
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+class VectorIndex:
+    """
+    In-process embedding index for one memory table.
+
+    Every stored embedding is loaded once, L2-normalized, into a contiguous
+    float32 matrix so a search is a single matrix-vector product instead of a
+    table scan plus a BLOB decode per row. Writes are picked up incrementally from the
+    `vector_changelog` table, which SQLite triggers fill for every writer
+    (including the separate consolidation process).
+
+    Once the table grows past `vector_ann_min_size` rows and hnswlib is
+    installed, searches first go through an HNSW graph built over the same
+    rows and fall back to the exact scan when filters leave too few hits.
+
+    `save_snapshot()` writes the dense matrix and its per-row columns to a
+    sidecar `.npz` file next to the database. A later process starts from that
+    snapshot and replays only the changelog written since, instead of
+    re-reading every embedding from the row-oriented table.
+    """
+
+    # Scalar columns kept alongside each vector for filtering: (status, confidence)
+    _FILTER_COLUMNS = {
+        'episodic_memory': "status, NULL",
+        'semantic_memory': "status, confidence",
+    }
+
+    _INITIAL_CAPACITY = 256
+    # Candidates fetched from the HNSW graph per requested hit, to leave room for filtering
+    _ANN_OVERSAMPLE = 3
+
+    def __init__(self, store: Any, table: str):
+        if table not in self._FILTER_COLUMNS:
+            raise ValueError(f"Unknown table: {table}")
+        self.store = store
+        self.table = table
+        self.ann_min_size = Config.data.get("memory", {}).get("vector_ann_min_size", 1000)
+        self.snapshot_path = f"{store.db_path}.{table}.npz"
+        self._lock = threading.Lock()
+        self._reset()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reset(self):
+        self._loaded = False
+        self._last_seq = 0
+        self._dim: Optional[int] = None
+        self._size = 0
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._status = np.empty(0, dtype=object)
+        self._confidence = np.empty(0, dtype=np.float32)
+        self._ann = None
+        self._ann_pending: Set[int] = set()
+
+    def invalidate(self):
+        """Drop the in-memory copy; it is rebuilt on the next search."""
+        with self._lock:
+            self._reset()
+
+    def search(
+        self,
+        query_embedding: Any,
+        limit: int,
+        status: Optional[str] = None,
+        min_confidence: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return up to `limit` (id, cosine_similarity) pairs, best first.
+
+        Args:
+            query_embedding: Query vector
+            limit: Maximum hits to return
+            status: Only consider rows with this status
+            min_confidence: Only consider rows with confidence strictly above this
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        with self._lock:
+            self._refresh()
+            n = self._size
+            if n == 0 or limit <= 0 or query.shape[0] != self._dim:
+                return []
+
+            mask = np.ones(n, dtype=bool)
+            if status is not None:
+                mask &= self._status[:n] == status
+            if min_confidence is not None:
+                mask &= self._confidence[:n] > min_confidence
+            # Rows are unit-norm, so cosine similarity is a plain dot product
+            query_norm = math.sqrt(float(np.vdot(query, query)))
+            if query_norm > 0:
+                query = query / query_norm
+
+            if hnswlib is not None and n >= self.ann_min_size and query_norm > 0:
+                hits = self._ann_search(query, limit, mask)
+                if hits is not None:
+                    return hits
+
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+
+            if candidates.size * 4 < n:
+                # Selective filter: gathering the few matching rows beats scoring the whole matrix
+                sims = self._matrix[candidates] @ query
+            else:
+                sims = (self._matrix[:n] @ query)[candidates]
+
+            if limit < sims.size:
+                top = np.argpartition(-sims, limit - 1)[:limit]
+            else:
+                top = np.arange(sims.size)
+            top = top[np.argsort(-sims[top], kind='stable')]
+
+            return [(self._ids[candidates[i]], float(sims[i])) for i in top]
+
+    def _ann_search(self, query: np.ndarray, limit: int, mask: np.ndarray) -> Optional[List[Tuple[str, float]]]:
+        """
+        Approximate top-k through the HNSW graph. Returns None when the
+        filters leave fewer than `limit` candidates, so the caller can
+        fall back to the exact scan.
+        """
+        ann = self._sync_ann()
+        n = self._size
+        k = min(n, limit * self._ANN_OVERSAMPLE)
+        ann.set_ef(max(k, 50))
+        labels, distances = ann.knn_query(query, k=k)
+
+        hits = []
+        for pos, dist in zip(labels[0].tolist(), distances[0].tolist()):
+            if mask[pos]:
+                # Inner-product space: distance = 1 - dot
+                hits.append((self._ids[pos], 1.0 - dist))
+                if len(hits) == limit:
+                    return hits
+        return None
+
+    def _sync_ann(self):
+        """Build the HNSW graph on first use, then add rows written since the last search; returns it."""
+        n = self._size
+        ann = self._ann
+        if ann is None:
+            # Only reached from search(), which checks both before taking the ANN path
+            assert hnswlib is not None and self._dim is not None
+            ann = hnswlib.Index(space='ip', dim=self._dim)
+            ann.init_index(max_elements=max(n, self._INITIAL_CAPACITY), ef_construction=200, M=16)
+            self._ann = ann
+            positions = np.arange(n)
+        else:
+            if not self._ann_pending:
+                return ann
+            if n > ann.get_max_elements():
+                ann.resize_index(max(n, ann.get_max_elements() * 2))
+            positions = np.fromiter(sorted(self._ann_pending), dtype=np.int64)
+
+        # Re-adding an existing label replaces its vector in place
+        ann.add_items(self._matrix[positions], positions)
+        self._ann_pending.clear()
+        return ann
+
+    def _refresh(self):
+        """Load the table on first use, then apply rows changed since the last search."""
+        with self.store._get_read_connection() as conn:
+            if self._loaded:
+                min_seq, max_seq = conn.execute(
+                    "SELECT MIN(seq), MAX(seq) FROM vector_changelog"
+                ).fetchone()
+                if max_seq is None or max_seq <= self._last_seq:
+                    return
+                if min_seq <= self._last_seq + 1:
+                    self._apply_changes(conn, max_seq)
+                    return
+                # Changelog was pruned past our position; start over
+                self._reset()
+
+            if self._load_snapshot(conn):
+                return
+
+            self._last_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM vector_changelog"
+            ).fetchone()[0]
+            self._load_all(conn.execute(
+                f"SELECT id, embedding, {self._FILTER_COLUMNS[self.table]} FROM {self.table} "
+                "WHERE embedding IS NOT NULL"
+            ).fetchall())
+            self._loaded = True
+            # Full loads are the slow path; leave a snapshot so the next process can skip it
+            self._write_snapshot()
+
+    def save_snapshot(self):
+        """Write the loaded index to its sidecar file (atomically replacing any older one)."""
+        with self._lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        if not self._loaded or self._size == 0:
+            return
+        n = self._size
+        tmp_path = None
+        try:
+            # Unique temp name: the app and the consolidation process may both be writing a snapshot
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.snapshot_path),
+                prefix=os.path.basename(self.snapshot_path) + ".",
+                suffix=".tmp"
+            )
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    db_id=np.array(self.store.db_id),
+                    last_seq=np.int64(self._last_seq),
+                    matrix=self._matrix[:n],
+                    ids=np.array(self._ids),
+                    # NULL status is stored as '' (np.str_ arrays can't hold None)
+                    status=np.array(['' if status is None else status for status in self._status[:n]]),
+                    confidence=self._confidence[:n]
+                )
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            sys.stderr.write(f"Could not write vector snapshot {self.snapshot_path}: {e}\n")
+
+    def _load_snapshot(self, conn) -> bool:
+        """
+        Start from the sidecar snapshot when it was taken from this database and the
+        changelog still covers every write since. Returns False if a full load is needed.
+        """
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with np.load(self.snapshot_path) as snapshot:
+                # Sequence numbers restart with a new database, so they only mean something for the same one
+                if str(snapshot['db_id']) != self.store.db_id:
+                    return False
+                last_seq = int(snapshot['last_seq'])
+                min_seq, max_seq = conn.execute(
+                    "SELECT MIN(seq), MAX(seq) FROM vector_changelog"
+                ).fetchone()
+                if max_seq is None or max_seq < last_seq or min_seq > last_seq + 1:
+                    return False
+
+                matrix = snapshot['matrix']
+                n, self._dim = matrix.shape
+                self._ensure_capacity(n)
+                self._matrix[:n] = matrix
+                self._ids = snapshot['ids'].tolist()
+                self._status[:n] = [status or None for status in snapshot['status'].tolist()]
+                self._confidence[:n] = snapshot['confidence']
+        except Exception as e:
+            # A damaged file (e.g. truncated: zipfile.BadZipFile) only costs a full load
+            sys.stderr.write(f"Ignoring unreadable vector snapshot {self.snapshot_path}: {e}\n")
+            self._reset()
+            return False
+
+        self._positions = {row_id: pos for pos, row_id in enumerate(self._ids)}
+        self._size = n
+        self._ann_pending.update(range(n))
+        self._last_seq = last_seq
+        self._loaded = True
+        if max_seq > last_seq:
+            self._apply_changes(conn, max_seq)
+        return True
+
+    def _load_all(self, rows: List[Tuple]):
+        """Bulk-build an empty index: copy BLOBs straight into the matrix and normalize in one pass."""
+        if not rows:
+            return
+        dim = len(rows[0][1]) // 4
+        row_bytes = dim * 4
+        rows = [row for row in rows if len(row[1]) == row_bytes]
+        n = len(rows)
+
+        self._dim = dim
+        self._ensure_capacity(n)
+        # Raw byte copies into the preallocated buffer; no intermediate joined bytes or per-row arrays
+        buffer = self._matrix.data.cast('B')
+        for i, row in enumerate(rows):
+            buffer[i * row_bytes:(i + 1) * row_bytes] = row[1]
+        matrix = self._matrix[:n]
+        norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+        np.divide(matrix, norms[:, None], out=matrix, where=norms[:, None] > 0)
+
+        self._ids = [row[0] for row in rows]
+        self._positions = {row_id: pos for pos, row_id in enumerate(self._ids)}
+        self._status[:n] = [row[2] for row in rows]
+        self._confidence[:n] = [row[3] if row[3] is not None else np.nan for row in rows]
+        self._size = n
+        self._ann_pending.update(range(n))
+
+    def _apply_changes(self, conn, max_seq: int):
+        changed = [row[0] for row in conn.execute(
+            "SELECT DISTINCT row_id FROM vector_changelog WHERE seq > ? AND seq <= ? AND table_name = ?",
+            (self._last_seq, max_seq, self.table)
+        ).fetchall()]
+        self._last_seq = max_seq
+
+        for i in range(0, len(changed), 500):
+            chunk = changed[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            self._apply_rows(conn.execute(
+                f"SELECT id, embedding, {self._FILTER_COLUMNS[self.table]} FROM {self.table} "
+                f"WHERE embedding IS NOT NULL AND id IN ({placeholders})",
+                chunk
+            ).fetchall())
+
+    def _apply_rows(self, rows: List[Tuple]):
+        """Insert or overwrite index rows from (id, embedding, status, confidence) tuples."""
+        for row_id, blob, status, confidence in rows:
+            vec = np.frombuffer(blob, dtype=np.float32)
+            if self._dim is None:
+                self._dim = vec.shape[0]
+            if vec.shape[0] != self._dim:
+                continue
+
+            pos = self._positions.get(row_id)
+            if pos is None:
+                pos = self._size
+                self._ensure_capacity(pos + 1)
+                self._ids.append(row_id)
+                self._positions[row_id] = pos
+                self._size += 1
+
+            # The store writes unit-norm vectors; this only guards rows from older or external writers
+            norm2 = float(np.vdot(vec, vec))
+            if norm2 > 0 and abs(norm2 - 1.0) > 1e-6:
+                self._matrix[pos] = vec / math.sqrt(norm2)
+            else:
+                self._matrix[pos] = vec
+            self._ann_pending.add(pos)
+            self._status[pos] = status
+            self._confidence[pos] = confidence if confidence is not None else np.nan
+
+    def _ensure_capacity(self, needed: int):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, self._INITIAL_CAPACITY)
+
+        matrix = np.zeros((new_capacity, self._dim), dtype=np.float32)
+        if self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+        status = np.empty(new_capacity, dtype=object)
+        status[:self._size] = self._status[:self._size]
+        confidence = np.full(new_capacity, np.nan, dtype=np.float32)
+        confidence[:self._size] = self._confidence[:self._size]
+
+        self._matrix = matrix
+        self._status, self._confidence = status, confidence
@@ -52,7 +52,7 @@ async def handle_input_logic(text: str, source: str, background_tasks: Optional[
     # This prevents the next voice loop iteration from thinking it needs a wake word
     # if it checks just before process_input starts.
     #if not is_text:
-    #    miyori_core.last_interaction_time = time.time()
+    #    miyori_core.last_interaction_time = time.monotonic()
 
     if not state_manager.can_accept_input(is_text):
         if not is_text: # Don't raise HTTP exception for background voice tasks
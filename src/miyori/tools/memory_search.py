@@ -130,5 +130,6 @@ def create_memory_search_tool(retriever: MemoryRetriever, embedding_service: Emb
                 required=False
             )
         ],
-        function=tool_instance.search_memory
+        function=tool_instance.search_memory,
+        read_only=True
     )
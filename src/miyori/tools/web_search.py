@@ -60,5 +60,6 @@ web_search_tool = Tool(
             required=False
         )
     ],
-    function=web_search
+    function=web_search,
+    read_only=True
 )
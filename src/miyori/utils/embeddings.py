@@ -1,8 +1,17 @@
+import numpy as np
 from google import genai
 from google.genai import types
-from typing import List
+from typing import Any, List
 from miyori.utils.config import Config
 
+def embedding_to_blob(embedding: Any) -> memoryview:
+    """
+    View an embedding as raw float32 bytes for a SQLite BLOB column.
+    Returns a memoryview over the array buffer instead of copying it into a bytes object.
+    """
+    arr = np.ascontiguousarray(embedding, dtype=np.float32)
+    return arr.data.cast('B')
+
 class EmbeddingService:
     def __init__(self):
             
@@ -18,8 +27,30 @@ class EmbeddingService:
             self.client = None
             print("Warning: API Key not found for EmbeddingService")
 
+    @staticmethod
+    def _normalize(values: List[float]) -> List[float]:
+        """L2-normalize an embedding so cosine similarity reduces to a dot product."""
+        vec = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+        return vec.tolist()
+
+    @classmethod
+    def _unit_vectors(cls, response: Any, expected: int) -> List[List[float]]:
+        """Normalized vectors from an embed_content response; a missing vector is an error, not a zero."""
+        embeddings = response.embeddings or []
+        if len(embeddings) != expected:
+            raise ValueError(f"expected {expected} embeddings, got {len(embeddings)}")
+        vectors = []
+        for emb in embeddings:
+            if emb.values is None:
+                raise ValueError("embedding response has no values")
+            vectors.append(cls._normalize(emb.values))
+        return vectors
+
     def embed(self, text: str, task_type: str = "retrieval_document") -> List[float]:
-        """Generate an embedding for the given text."""
+        """Generate a unit-length embedding for the given text."""
         if not self.client:
             # MVP Fallback: return dummy zeros
             return [0.0] * 768
@@ -30,7 +61,7 @@ class EmbeddingService:
                 contents=text,
                 config=types.EmbedContentConfig(task_type=task_type)
             )
-            return response.embeddings[0].values
+            return self._unit_vectors(response, 1)[0]
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return [0.0] * 768
@@ -54,7 +85,7 @@ class EmbeddingService:
                     contents=batch_texts,
                     config=types.EmbedContentConfig(task_type=task_type)
                 )
-                all_embeddings.extend([emb.values for emb in response.embeddings])
+                all_embeddings.extend(self._unit_vectors(response, len(batch_texts)))
 
             return all_embeddings
         except Exception as e:
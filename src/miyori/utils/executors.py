@@ -0,0 +1,25 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from miyori.utils.config import Config
+
+_model_executor: Optional[ThreadPoolExecutor] = None
+_model_executor_lock = threading.Lock()
+
+def get_model_executor() -> ThreadPoolExecutor:
+    """
+    Shared, bounded thread pool for blocking embedding and LLM calls.
+
+    Using one sized pool instead of the event loop's default executor caps
+    outbound concurrency to the provider and avoids spinning up threads per burst.
+    """
+    global _model_executor
+    if _model_executor is None:
+        with _model_executor_lock:
+            if _model_executor is None:
+                max_workers = Config.data.get("memory", {}).get("model_executor_workers", 4)
+                _model_executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="miyori-model"
+                )
+    return _model_executor
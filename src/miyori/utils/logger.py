@@ -2,6 +2,7 @@ import sys
 import os
 import datetime
 import io
+import threading
 from contextlib import contextmanager
 from miyori.utils.config import Config
 
@@ -20,6 +21,9 @@ class Tee:
                 stream.flush()
             except Exception:
                 pass # Avoid crashing if a stream is closed
+        # Session buffers only see output from the thread that opened them
+        for buffer in _session_buffers.get(threading.get_ident(), ()):
+            buffer.write(data)
 
     def flush(self):
         for stream in self.streams:
@@ -51,6 +55,9 @@ class Tee:
 _stdout_tee = None
 _stderr_tee = None
 
+# capture_session() buffers, keyed by the thread that opened them
+_session_buffers = {}
+
 def setup_logging():
     """
     Initializes a log file in the \logs directory and redirects 
@@ -90,20 +97,22 @@ def setup_logging():
 @contextmanager
 def capture_session():
     """
-    Context manager to capture all stdout/stderr output within a block.
-    Integrates with the existing Tee loggers if they are active.
+    Context manager to capture stdout/stderr output written by the current thread within a block.
+    Integrates with the existing Tee loggers if they are active; sessions on other threads
+    (e.g. tools running in parallel) don't see each other's output.
     """
     buffer = io.StringIO()
-    
-    if _stdout_tee:
-        _stdout_tee.add_stream(buffer)
-    if _stderr_tee:
-        _stderr_tee.add_stream(buffer)
-        
+    if not (_stdout_tee or _stderr_tee):
+        yield buffer
+        return
+
+    thread_id = threading.get_ident()
+    _session_buffers[thread_id] = _session_buffers.get(thread_id, ()) + (buffer,)
     try:
         yield buffer
     finally:
-        if _stdout_tee:
-            _stdout_tee.remove_stream(buffer)
-        if _stderr_tee:
-            _stderr_tee.remove_stream(buffer)
+        remaining = tuple(b for b in _session_buffers.get(thread_id, ()) if b is not buffer)
+        if remaining:
+            _session_buffers[thread_id] = remaining
+        else:
+            _session_buffers.pop(thread_id, None)
@@ -13,6 +13,7 @@ Tests cover:
 import sys
 import os
 import pytest
+from contextlib import contextmanager
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -26,6 +27,8 @@ Config.load()
 
 from miyori.memory.confidence_manager import ConfidenceManager
 from miyori.memory.merge_manager import MergeManager
+from miyori.memory.consolidation import EpisodeClustering
+from miyori.memory.quantization import quantize_int8
 
 
 class MockMemoryStore:
@@ -56,6 +59,10 @@ class MockMemoryStore:
                 self.archived_facts.append(lid)
         return True
     
+    @contextmanager
+    def transaction(self):
+        yield
+    
     def _get_connection(self):
         """Mock connection for retriever compatibility."""
         return MockConnection(self)
@@ -397,6 +404,39 @@ class TestMergeEvidencePreservation:
         assert store.facts['f2']['merged_into_id'] == 'f1'
 
 
+# ==================== Episode Clustering Tests ====================
+
+class TestEpisodeClustering:
+    """Tests for the embeddings EpisodeClustering feeds to HDBSCAN."""
+
+    def test_missing_scale_falls_back_to_float_embedding(self):
+        """Int8 codes without a scale are ignored in favour of the float embedding."""
+        vectors = [np.eye(8, dtype=np.float32)[i] for i in range(3)]
+        episodes = [
+            create_test_episode(f'e{i}', f'episode {i}', embedding=vec.tobytes())
+            for i, vec in enumerate(vectors)
+        ]
+        for episode, vec in zip(episodes, vectors):
+            episode['embedding_i8'], episode['embedding_scale'] = quantize_int8(vec)
+        episodes[1]['embedding_scale'] = None
+        # Nothing usable at all: skipped
+        orphan = create_test_episode('e3', 'codes only')
+        orphan.update(embedding=None, embedding_i8=quantize_int8(vectors[0])[0], embedding_scale=None)
+        episodes.append(orphan)
+
+        clustering = EpisodeClustering()
+        clustering.min_cluster_size = 3
+        seen = []
+        def capture(embeddings_array):
+            seen.append(embeddings_array)
+            return embeddings_array
+        with patch.object(clustering, '_reduce_dimensions', side_effect=capture):
+            clusters = clustering.cluster_episodes(episodes)
+
+        assert sorted(ep['id'] for cluster in clusters for ep in cluster) == ['e0', 'e1', 'e2']
+        np.testing.assert_allclose(seen[0], np.stack(vectors), atol=1e-2)
+
+
 # ==================== Integration Test ====================
 
 class TestFullConsolidationFlow:
@@ -1,7 +1,11 @@
 import sys
 import os
+import json
+import threading
 from pathlib import Path
 
+import pytest
+
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -36,6 +40,46 @@ def test_chat_history():
     assert len(new_msgs) < 4 # Should have trimmed something
     print("ChatHistory tests passed!")
 
+def _expected_tokens(messages):
+    """Recount a history from scratch with the default len // 4 heuristic."""
+    total = 0
+    for msg in messages:
+        for key, value in msg.items():
+            if key == "role":
+                continue
+            if key == "tool_calls":
+                total += sum(len(json.dumps(call, separators=(",", ":"))) // 4 for call in value)
+            else:
+                total += len(str(value)) // 4
+    return total
+
+def test_chat_history_token_cache():
+    history = ChatHistory(max_tokens=200, trim_chunk_size=50)
+    for i in range(20):
+        history.add_message("user", "question " * (i + 1))
+        history.add_message("miyori", "answer " * 10, tool_calls=[{"id": str(i), "name": "t"}])
+        history.add_message("tool", "result " * 5, name="t", tool_call_id=str(i))
+
+        # Cached running total must match a full recount after every trim
+        assert history.get_token_count() == _expected_tokens(history.get_history())
+        assert history.get_history()[0]["role"] == "user"
+        assert history.get_history()[history.last_user_index()]["content"] == "question " * (i + 1)
+
+    history.clear()
+    assert history.get_token_count() == 0
+    assert history.last_user_index() is None
+
+def test_chat_history_keep_last_turns():
+    history = ChatHistory()
+    for i in range(5):
+        history.add_message("user", f"question {i}")
+        history.add_message("miyori", f"answer {i}")
+
+    assert history.keep_last_turns(2) == 6
+    assert [m["content"] for m in history.get_history()] == ["question 3", "answer 3", "question 4", "answer 4"]
+    assert history.get_token_count() == _expected_tokens(history.get_history())
+    assert history.keep_last_turns(5) == 0
+
 def test_llm_coordinator():
     print("Testing LLMCoordinator...")
     
@@ -45,7 +89,12 @@ def test_llm_coordinator():
             msg = {"role": role, "content": content}
             msg.update(kwargs)
             self.msgs.append(msg)
-        def get_history(self): return self.msgs
+        def add_messages(self, msgs): self.msgs.extend(msgs)
+        def get_history(self): return list(self.msgs)
+        def last_user_index(self):
+            user_indices = [i for i, msg in enumerate(self.msgs) if msg["role"] == "user"]
+            return user_indices[-1] if user_indices else None
+        def seq_range(self): return 0, len(self.msgs)
         def clear(self): self.msgs = []
 
     def mock_translate(msgs): return msgs
@@ -86,6 +135,203 @@ def test_llm_coordinator():
     
     print("LLMCoordinator tests passed!")
 
+def _make_coordinator(**kwargs):
+    options = dict(
+        chat_history=ChatHistory(),
+        translate_to_provider_callback=lambda msgs: msgs,
+        call_provider_api_callback=lambda msgs, config: {"text": "", "tool_calls": []},
+        parse_provider_response_callback=lambda resp: resp,
+        format_tool_result_callback=lambda id, name, res: res
+    )
+    options.update(kwargs)
+    return LLMCoordinator(**options)
+
+def _calls(*names):
+    return [{"id": str(i), "name": name, "arguments": {"n": i}} for i, name in enumerate(names)]
+
+def test_execute_tool_calls_sequential_unless_read_only():
+    coordinator = _make_coordinator()
+    started = []
+
+    def on_tool(name, args):
+        started.append(args["n"])
+        return f"{name}-{args['n']}"
+
+    # Not all read-only: one at a time, in order
+    results = list(coordinator._execute_tool_calls(_calls("terminal", "terminal", "web_search"), on_tool, frozenset({"web_search"})))
+    assert started == [0, 1, 2]
+    assert [result for _, result in results] == ["terminal-0", "terminal-1", "web_search-2"]
+
+    # All read-only: the calls only get past the barrier if they run concurrently
+    barrier = threading.Barrier(2, timeout=5)
+
+    def on_read_only_tool(name, args):
+        barrier.wait()
+        return f"{name}-{args['n']}"
+
+    results = list(coordinator._execute_tool_calls(_calls("web_search", "search_memory"), on_read_only_tool, frozenset({"web_search", "search_memory"})))
+    assert [(tc["id"], result) for tc, result in results] == [("0", "web_search-0"), ("1", "search_memory-1")]
+
+def test_execute_tool_calls_reuses_one_bounded_pool():
+    coordinator = _make_coordinator(max_parallel_tools=2)
+    workers = set()
+
+    def on_tool(name, args):
+        workers.add(threading.current_thread().name)
+        return name
+
+    for _ in range(10):
+        list(coordinator._execute_tool_calls(_calls("web_search", "web_search", "web_search"), on_tool, frozenset({"web_search"})))
+    assert 1 <= len(workers) <= 2
+
+    coordinator.close()
+    # After close() nothing can be submitted any more
+    with pytest.raises(RuntimeError):
+        list(coordinator._execute_tool_calls(_calls("web_search", "web_search"), on_tool, frozenset({"web_search"})))
+
+def test_execute_tool_calls_stops_at_exception():
+    coordinator = _make_coordinator()
+    started = []
+
+    def on_tool(name, args):
+        started.append(name)
+        if name == "exit_loop":
+            raise RuntimeError("exit")
+        return name
+
+    results = []
+    with pytest.raises(RuntimeError):
+        for tc, result in coordinator._execute_tool_calls(_calls("terminal", "exit_loop", "terminal"), on_tool):
+            results.append(result)
+    assert results == ["terminal"]
+    # Nothing after the raising call was started
+    assert started == ["terminal", "exit_loop"]
+
+    # Parallel batch: earlier results are still yielded before the exception surfaces
+    results = []
+    with pytest.raises(RuntimeError):
+        for tc, result in coordinator._execute_tool_calls(_calls("web_search", "exit_loop"), on_tool, frozenset({"web_search", "exit_loop"})):
+            results.append(result)
+    assert results == ["web_search"]
+
+class _Stream:
+    """Provider stream stub: yields deltas, optionally raises after them, and records close()."""
+    def __init__(self, deltas, error=None):
+        self.deltas, self.error, self.closed = deltas, error, False
+    def __iter__(self):
+        yield from self.deltas
+        if self.error:
+            raise self.error
+    def close(self):
+        self.closed = True
+
+def test_consume_stream_interrupt():
+    stream = _Stream([{"thought": "hmm"}, {"text": "One. "}, {"text": "Two. "}, {"text": "Three."}])
+    coordinator = _make_coordinator(stream_provider_api_callback=lambda msgs, config: stream)
+    chunks = []
+    checks = iter([False, False, True])
+
+    parsed = coordinator._consume_stream([], None, chunks.append, lambda: next(checks))
+    assert chunks == ["One. ", "Two. "]
+    assert parsed["text"] == "One. Two. "
+    assert parsed["interrupted"] and not parsed["failed"]
+    assert stream.closed
+
+def test_consume_stream_failure():
+    # Fails before any text: raised like a failed blocking call
+    stream = _Stream([{"thought": "hmm"}], error=RuntimeError("boom"))
+    coordinator = _make_coordinator(stream_provider_api_callback=lambda msgs, config: stream)
+    with pytest.raises(RuntimeError):
+        coordinator._consume_stream([], None, lambda text: None, None)
+    assert stream.closed
+
+    # Fails after text was spoken: the partial reply is kept in history and stored
+    stream = _Stream([{"text": "Partial "}, {"text": "answer"}], error=RuntimeError("boom"))
+    coordinator = _make_coordinator(stream_provider_api_callback=lambda msgs, config: stream)
+    chunks, stored = [], []
+    coordinator.run(
+        prompt="Question",
+        tools=[],
+        on_chunk=chunks.append,
+        on_tool_call=lambda n, a: "",
+        store_turn_callback=lambda prompt, text: stored.append((prompt, text))
+    )
+    assert chunks == ["Partial ", "answer"]
+    assert coordinator.chat_history.get_history()[-1] == {"role": "miyori", "content": "Partial answer"}
+    assert stored == [("Question", "Partial answer")]
+
+def test_translation_cache_matches_uncached():
+    pytest.importorskip("google.genai")
+    from miyori.implementations.llm.google_ai_backend import GoogleAIBackend
+
+    def backend():
+        # Only the translation caches are needed; skip client and memory setup
+        instance = GoogleAIBackend.__new__(GoogleAIBackend)
+        instance._parts_cache, instance._content_cache = {}, {}
+        return instance
+
+    cached = backend()
+
+    def check(messages):
+        out = cached._translate_to_provider_format(messages)
+        expected = backend()._translate_to_provider_format(messages)
+        assert [c.model_dump() for c in out] == [c.model_dump() for c in expected]
+        return out
+
+    history = ChatHistory()
+    previous = []
+    for i in range(4):
+        history.add_message("user", f"question {i}")
+        history.add_message("miyori", "", tool_calls=[{"id": str(i), "name": "web_search", "arguments": {"query": str(i)}}])
+        history.add_message("tool", f"result {i}", name="web_search", tool_call_id=str(i))
+        history.add_message("miyori", f"answer {i}")
+        out = check(history.get_history())
+        # Groups that were already translated are reused as-is
+        assert all(a is b for a, b in zip(out, previous[:-1]))
+        previous = out
+
+    # Trimmed: the first turns are gone
+    history.keep_last_turns(2)
+    out = check(history.get_history())
+    assert out[0] is previous[-len(out)]
+
+    # Context-patched: the coordinator swaps in a copy of the newest user turn
+    messages = history.get_history()
+    i = history.last_user_index()
+    messages[i] = dict(messages[i], content="[memory]\n\n" + messages[i]["content"])
+    check(messages)
+    # ... which must not leak into the next, unpatched translation
+    check(history.get_history())
+
+def test_history_log_excludes_patched_context(monkeypatch):
+    appended = []
+    monkeypatch.setattr(LLMCoordinator, "_append_log", lambda self, filename, records: appended.extend(records))
+    monkeypatch.setattr(LLMCoordinator, "_log_to_file", lambda self, filename, data: None)
+
+    responses = iter([
+        {"text": "", "tool_calls": [{"id": "1", "name": "web_search", "arguments": {}}]},
+        {"text": "Done", "tool_calls": []},
+    ])
+    coordinator = _make_coordinator(call_provider_api_callback=lambda msgs, config: next(responses))
+    sent = []
+    coordinator._translate_to_provider = lambda msgs: sent.append(msgs) or msgs
+
+    class ContextBuilder:
+        def build_context(self, prompt): return "[MEMORY]"
+
+    coordinator.run(
+        prompt="Question",
+        tools=[],
+        on_chunk=lambda text: None,
+        on_tool_call=lambda n, a: "result",
+        context_builder=ContextBuilder()
+    )
+
+    # Both calls carried the memory block, but the log holds the history itself
+    assert all(msgs[0]["content"].startswith("[MEMORY]") for msgs in sent)
+    assert appended == coordinator.chat_history.get_history()[:-1]
+    assert not any("[MEMORY]" in str(record.get("content")) for record in appended)
+
 if __name__ == "__main__":
     try:
         test_chat_history()
@@ -0,0 +1,244 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from miyori.utils.config import Config
+Config.load()
+from miyori.memory.sqlite_store import SQLiteMemoryStore
+from miyori.memory.memory_retriever import MemoryRetriever
+from miyori.memory.vector_index import VectorIndex, hnswlib
+
+DIM = 8
+
+def _vec(i):
+    """A distinct unit direction per i."""
+    vec = np.zeros(DIM, dtype=np.float32)
+    vec[i % DIM] = 1.0
+    vec[(i + 1) % DIM] = 0.1 * (i // DIM + 1)
+    return vec
+
+@pytest.fixture
+def open_store(tmp_path, monkeypatch):
+    """Open SQLiteMemoryStore instances on a database in tmp_path."""
+    monkeypatch.setattr(Config, "_root", tmp_path)
+    stores = []
+
+    def _open():
+        store = SQLiteMemoryStore()
+        stores.append(store)
+        return store
+
+    yield _open
+    for store in stores:
+        try:
+            store.close()
+        except Exception:
+            pass
+
+def _add_episodes(store, count):
+    return [
+        store.add_episode({"summary": f"episode {i}", "embedding": _vec(i), "status": "active"})
+        for i in range(count)
+    ]
+
+def test_truncated_snapshot_falls_back_to_full_load(open_store):
+    store = open_store()
+    ids = _add_episodes(store, 5)
+    index = store.get_vector_index('episodic_memory')
+    assert index.search(_vec(2), 1)[0][0] == ids[2]
+    store.close()
+
+    snapshot = Path(index.snapshot_path)
+    data = snapshot.read_bytes()
+    snapshot.write_bytes(data[:len(data) // 2])
+
+    store = open_store()
+    assert store.search_episodes(_vec(3), limit=1)[0]['id'] == ids[3]
+    # The full load left a readable snapshot behind, and no temp files
+    assert sorted(p.name for p in snapshot.parent.glob(snapshot.name + "*")) == [snapshot.name]
+
+def test_snapshot_of_a_recreated_database_is_ignored(open_store):
+    store = open_store()
+    old_ids = _add_episodes(store, 6)
+    store.search_episodes(_vec(0), limit=1)
+    store.close()
+    snapshot = Path(store.get_vector_index('episodic_memory').snapshot_path)
+    assert snapshot.exists()
+
+    # Same path, new database: its changelog numbers overlap the snapshot's
+    for path in Path(store.db_path).parent.glob(Path(store.db_path).name + "*"):
+        if path != snapshot:
+            path.unlink()
+    store = open_store()
+    new_ids = _add_episodes(store, 6)
+
+    hits = store.search_episodes(_vec(2), limit=6)
+    assert hits[0]['id'] == new_ids[2]
+    assert not set(old_ids) & {hit['id'] for hit in hits}
+
+def test_retriever_results_are_plain_rows(open_store):
+    store = open_store()
+    def vec(*head):
+        return np.array(head + (0,) * (DIM - len(head)), dtype=np.float32)
+
+    ids = [
+        store.add_episode({"summary": "best", "embedding": vec(1, 0.3), "status": "active"}),
+        store.add_episode({"summary": "near duplicate", "embedding": vec(1, 0.35), "status": "active"}),
+        store.add_episode({"summary": "different", "embedding": vec(1, -0.6), "status": "active"}),
+    ]
+    retriever = MemoryRetriever(store)
+
+    results = retriever.vector_search(vec(1), 'episodic_memory', limit=3, filters={'status': 'active'})
+    assert [r['id'] for r in results] == ids
+    assert not any(key.startswith('_') for result in results for key in result)
+
+    # MMR skips the near duplicate of the best hit in favour of the different one
+    diverse = retriever.search_memories(vec(1), 'episodic', limit=2, filters={'status': 'active'})
+    assert [r['id'] for r in diverse] == [ids[0], ids[2]]
+    assert not any(key.startswith('_') for result in diverse for key in result)
+
+def test_search_sees_writes_from_another_connection(open_store):
+    store = open_store()
+    ids = _add_episodes(store, 4)
+    assert store.search_episodes(_vec(0), limit=1)[0]['id'] == ids[0]
+
+    # A second store on the same database stands in for the consolidation process
+    other = open_store()
+    other.update_episode(ids[0], {'embedding': _vec(5)})
+    other.set_episodes_status([ids[1]], 'archived')
+    new_id = other.add_episode({"summary": "new", "embedding": _vec(6), "status": "active"})
+
+    assert store.search_episodes(_vec(5), limit=1)[0]['id'] == ids[0]
+    assert store.search_episodes(_vec(6), limit=1)[0]['id'] == new_id
+    assert ids[1] not in [r['id'] for r in store.search_episodes(_vec(1), limit=10)]
+    assert [r['id'] for r in store.search_episodes(_vec(1), limit=1, status='archived')] == [ids[1]]
+
+def test_semantic_confidence_filter(open_store):
+    store = open_store()
+    low = store.add_semantic_fact({"fact": "low", "embedding": _vec(0), "confidence": 0.3})
+    high = store.add_semantic_fact({"fact": "high", "embedding": _vec(1), "confidence": 0.9})
+
+    hits = store.vector_search('semantic_memory', _vec(0), 5, status='stable', min_confidence=0.5)
+    assert [r['id'] for r in hits] == [high]
+
+    store.update_semantic_fact(low, {'confidence': 0.8})
+    hits = store.vector_search('semantic_memory', _vec(0), 5, status='stable', min_confidence=0.5)
+    assert [r['id'] for r in hits] == [low, high]
+
+def test_capacity_grows_past_initial_allocation(open_store):
+    store = open_store()
+    ids = _add_episodes(store, 2)
+    index = store.get_vector_index('episodic_memory')
+    assert index.search(_vec(0), 1)[0][0] == ids[0]
+
+    # Added after the first load, so they arrive through the changelog one row at a time
+    more = [
+        store.add_episode({"summary": f"more {i}", "embedding": _vec(i), "status": "active"})
+        for i in range(2, 2 + index._INITIAL_CAPACITY + 50)
+    ]
+    assert index.search(_vec(len(more) + 1), 1)[0][0] == more[-1]
+    assert len(index) == 2 + len(more)
+    assert index.search(_vec(1), 1)[0][0] == ids[1]
+
+def test_reopen_from_snapshot_replays_later_writes(open_store, monkeypatch):
+    store = open_store()
+    ids = _add_episodes(store, 5)
+    store.search_episodes(_vec(0), limit=1)
+    store.close()
+
+    # Written after the snapshot; this store never searches, so it leaves the snapshot alone
+    writer = open_store()
+    writer.update_episode(ids[0], {'embedding': _vec(6)})
+    writer.close()
+
+    def no_full_load(self, rows):
+        raise AssertionError("expected to start from the snapshot")
+    monkeypatch.setattr(VectorIndex, "_load_all", no_full_load)
+
+    store = open_store()
+    assert store.search_episodes(_vec(6), limit=1)[0]['id'] == ids[0]
+    assert store.search_episodes(_vec(3), limit=1)[0]['id'] == ids[3]
+
+def test_pruned_changelog_forces_full_load(open_store, monkeypatch):
+    store = open_store()
+    ids = _add_episodes(store, 5)
+    index = store.get_vector_index('episodic_memory')
+    store.search_episodes(_vec(0), limit=1)
+    snapshot_seq = index._last_seq
+    store.close()
+
+    full_loads = []
+    load_all = VectorIndex._load_all
+    def counting_load_all(self, rows):
+        full_loads.append(len(rows))
+        return load_all(self, rows)
+    monkeypatch.setattr(VectorIndex, "_load_all", counting_load_all)
+
+    # Two writes after the snapshot, then the first of them is pruned from the changelog:
+    # replaying what is left would miss it, so the snapshot must be rejected
+    writer = open_store()
+    writer.update_episode(ids[0], {'embedding': _vec(6)})
+    writer.set_episodes_status([ids[1]], 'archived')
+    with writer._get_connection() as conn:
+        conn.execute("DELETE FROM vector_changelog WHERE seq <= ?", (snapshot_seq + 1,))
+
+    store = open_store()
+    assert store.search_episodes(_vec(6), limit=1)[0]['id'] == ids[0]
+    assert full_loads == [5]
+
+    # The same applies to an index that is already loaded and falls behind
+    writer.update_episode(ids[2], {'embedding': _vec(7)})
+    writer.update_episode(ids[3], {'embedding': _vec(12)})
+    with writer._get_connection() as conn:
+        conn.execute(
+            "DELETE FROM vector_changelog WHERE seq <= ?",
+            (store.get_vector_index('episodic_memory')._last_seq + 1,)
+        )
+    assert store.search_episodes(_vec(7), limit=1)[0]['id'] == ids[2]
+    assert full_loads == [5, 5]
+
+@pytest.mark.skipif(hnswlib is None, reason="hnswlib not installed")
+def test_ann_search_and_filtered_fallback(open_store, monkeypatch):
+    monkeypatch.setattr(Config, "data", {"memory": {"vector_ann_min_size": 4}})
+    # Records, per search, whether the HNSW graph answered (True) or left it to the exact scan (False)
+    answered = []
+    ann_search = VectorIndex._ann_search
+    def recording_ann_search(self, *args):
+        hits = ann_search(self, *args)
+        answered.append(hits is not None)
+        return hits
+    monkeypatch.setattr(VectorIndex, "_ann_search", recording_ann_search)
+
+    store = open_store()
+    ids = _add_episodes(store, 40)
+    index = store.get_vector_index('episodic_memory')
+
+    hits = index.search(_vec(17), 3, status='active')
+    assert index._ann is not None
+    assert hits[0][0] == ids[17]
+    assert hits == sorted(hits, key=lambda hit: -hit[1])
+
+    # Rows changed after the graph was built are re-added to it
+    store.update_episode(ids[17], {'embedding': _vec(30)})
+    assert index.search(_vec(17), 1, status='active')[0][0] != ids[17]
+
+    # Only two rows match the filter: the graph's candidates can't fill the limit, so the exact scan answers
+    store.set_episodes_status([ids[5], ids[33]], 'archived')
+    hits = index.search(_vec(0), 3, status='archived')
+    assert sorted(row_id for row_id, _ in hits) == sorted([ids[5], ids[33]])
+    assert answered == [True, True, False]
+
+def test_read_connections_close_with_their_threads(open_store):
+    store = open_store()
+    _add_episodes(store, 3)
+    for _ in range(5):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda i: store.search_episodes(_vec(i), limit=1), range(3)))
+    assert store._read_conns == []
+
+    store.search_episodes(_vec(0), limit=1)
+    assert len(store._read_conns) == 1